@@ -0,0 +1,157 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import pandas as pd
+
+from benchmarks.synthetic_data import generate_dataset
+from src.analysis.cross_selling import count_product_pairs
+from src.analysis.cube import build_monthly_cube, get_monthly_cube
+from src.analysis.exploratory_analysis import (ANALYSES, ANALYSIS_COLUMNS, analyze_churn,
+                                               analyze_ticket_medio)
+from src.etl.cache import clear_cache
+from src.etl.data_loader import load_all_data
+from src.etl.data_quality import check_data_quality
+from src.etl.sales_fact import build_sales_fact, clear_sales_fact_cache, get_sales_fact
+from src.etl.streaming import stream_sales_aggregates
+
+DEFAULT_SCALES = [1, 10, 100, 1000]
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def measure(fn, repeat=1):
+    best_wall = best_cpu = None
+    peak = 0
+    result = None
+    for _ in range(repeat):
+        tracemalloc.start()
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = fn()
+        wall, cpu = time.perf_counter() - wall_start, time.process_time() - cpu_start
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+        best_wall = wall if best_wall is None else min(best_wall, wall)
+        best_cpu = cpu if best_cpu is None else min(best_cpu, cpu)
+    return result, {'wall_s': best_wall, 'cpu_s': best_cpu, 'peak_mb': peak / 1024 ** 2}
+
+
+def _load_full(data_dir, use_cache):
+    data = load_all_data(data_dir, use_cache=use_cache)
+    return {name: data[name] for name in data}
+
+
+def _load_projected(data_dir):
+    data = load_all_data(data_dir, columns=ANALYSIS_COLUMNS)
+    for table in ANALYSIS_COLUMNS:
+        data[table]
+    return data
+
+
+def benchmark_scale(scale, repeat=1, seed=0):
+    results = []
+
+    def record(stage, fn, rows=None, stage_repeat=repeat):
+        result, metrics = measure(fn, stage_repeat)
+        results.append(dict(scale=scale, stage=stage, rows=rows, **metrics))
+        return result
+
+    with tempfile.TemporaryDirectory(prefix=f'northwind_x{scale}_') as data_dir:
+        sizes = generate_dataset(data_dir, scale, seed)
+        lines = sizes['order_details']
+
+        record('load_all_data[csv]', lambda: _load_full(data_dir, use_cache=False), lines)
+        clear_cache(data_dir)
+        record('load_all_data[cache_build]', lambda: _load_full(data_dir, use_cache=True), lines, 1)
+        record('load_all_data[cache_warm]', lambda: _load_full(data_dir, use_cache=True), lines)
+        data = record('load_all_data[projected]', lambda: _load_projected(data_dir), lines)
+
+        record('check_data_quality', lambda: check_data_quality(data), lines)
+        record('build_sales_fact', lambda: build_sales_fact(data), lines)
+
+        clear_sales_fact_cache()
+        get_sales_fact(data)
+        record('build_monthly_cube', lambda: build_monthly_cube(get_sales_fact(data)), lines)
+        # Cubo já montado: as análises abaixo medem só o rollup
+        get_monthly_cube(data)
+        for analysis in ANALYSES:
+            record(analysis.__name__, lambda: analysis(data), lines)
+
+        record('analyze_ticket_medio', lambda: analyze_ticket_medio(data['orders'], data['order_details']), lines)
+        record('analyze_churn', lambda: analyze_churn(data['orders']), sizes['orders'])
+        record('count_product_pairs', lambda: count_product_pairs(data['order_details']), lines)
+        record('stream_sales_aggregates', lambda: stream_sales_aggregates(data_dir), lines)
+        clear_sales_fact_cache()
+
+    return results
+
+
+def run(scales, repeat=1, seed=0):
+    results = []
+    for scale in scales:
+        results.extend(benchmark_scale(scale, repeat, seed))
+    return {
+        'commit': git_commit(),
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'repeat': repeat,
+        'results': results,
+    }
+
+
+def compare(current, baseline):
+    key = ['scale', 'stage']
+    merged = pd.DataFrame(current['results']).merge(
+        pd.DataFrame(baseline['results']), on=key, suffixes=('', '_baseline'))
+    merged['wall_ratio'] = merged['wall_s'] / merged['wall_s_baseline']
+    merged['peak_ratio'] = merged['peak_mb'] / merged['peak_mb_baseline']
+    return merged[key + ['wall_s_baseline', 'wall_s', 'wall_ratio', 'peak_mb_baseline', 'peak_mb', 'peak_ratio']]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark do carregamento e das análises com dados sintéticos')
+    parser.add_argument('--scales', type=float, nargs='+', default=DEFAULT_SCALES)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='arquivo JSON de saída (padrão: benchmarks/results/<commit>.json)')
+    parser.add_argument('--compare', help='JSON de uma execução anterior para comparação')
+    args = parser.parse_args()
+
+    report = run(args.scales, args.repeat, args.seed)
+    output = args.output or os.path.join(RESULTS_DIR, f"{report['commit']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+
+    summary = pd.DataFrame(report['results']).set_index(['scale', 'stage'])
+    print(summary.round(4).to_string())
+    print(f"\nResultados salvos em {output}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        print("\nComparação com a execução de referência:")
+        print(compare(report, baseline).round(3).to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Orçamento de inicialização (segundos, mediana) e módulos que cada comando não pode importar
+STARTUP_BUDGETS = {
+    '--help': 0.3,
+    'list': 0.3,
+    'kpis': 1.5,
+    'churn': 1.5,
+}
+FORBIDDEN_MODULES = ('plotly', 'matplotlib', 'seaborn', 'IPython', 'jupyter', 'duckdb')
+LIGHT_COMMANDS = ('--help', 'list')
+
+
+def imported_modules(command):
+    completed = subprocess.run([sys.executable, '-X', 'importtime', '-m', 'src.cli', *command.split()],
+                               cwd=REPO_ROOT, capture_output=True, text=True)
+    modules = set()
+    for line in completed.stderr.splitlines():
+        if line.startswith('import time:') and '|' in line:
+            modules.add(line.rsplit('|', 1)[1].strip())
+    return modules
+
+
+def time_command(command, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-m', 'src.cli', *command.split()], cwd=REPO_ROOT,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def check_budgets(repeat=5):
+    rows = []
+    for command, budget in STARTUP_BUDGETS.items():
+        modules = imported_modules(command)
+        top_level = {module.split('.')[0] for module in modules}
+        forbidden = sorted(top_level & set(FORBIDDEN_MODULES))
+        if command in LIGHT_COMMANDS and 'pandas' in top_level:
+            forbidden.append('pandas')
+        elapsed = time_command(command, repeat)
+        rows.append({'command': command, 'median_s': elapsed, 'budget_s': budget,
+                     'modules': len(modules), 'forbidden': forbidden,
+                     'ok': elapsed <= budget and not forbidden})
+    return rows
+
+
+def check_constants():
+    # A CLI copia estas constantes para não importar pandas no --help; aqui elas são comparadas
+    # com as originais, importadas só nesta verificação
+    from src import cli
+    from src.analysis.churn import DEFAULT_WINDOW_DAYS
+    from src.analysis.exploratory_analysis import ANALYSES, BACKENDS
+    from src.etl.streaming import DEFAULT_CHUNK_SIZE
+
+    expected = {
+        'ANALYSIS_COMMANDS': tuple(analysis.__name__.removeprefix('analyze_') for analysis in ANALYSES),
+        'BACKENDS': tuple(BACKENDS),
+        'DEFAULT_WINDOW_DAYS': DEFAULT_WINDOW_DAYS,
+        'DEFAULT_CHUNK_SIZE': DEFAULT_CHUNK_SIZE,
+    }
+    return {name: (getattr(cli, name), value) for name, value in expected.items() if getattr(cli, name) != value}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Mede o tempo de inicialização da CLI contra o orçamento')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    drift = check_constants()
+    for name, (cli_value, expected) in drift.items():
+        print(f"src/cli.py: {name} = {cli_value!r}, esperado {expected!r}")
+
+    rows = check_budgets(args.repeat)
+    for row in rows:
+        status = 'ok' if row['ok'] else 'ESTOURO'
+        forbidden = f" importou {', '.join(row['forbidden'])}" if row['forbidden'] else ''
+        print(f"{row['command']:<10} {row['median_s'] * 1000:8.1f} ms  (orçamento {row['budget_s'] * 1000:.0f} ms, "
+              f"{row['modules']} módulos) {status}{forbidden}")
+    return 0 if all(row['ok'] for row in rows) and not drift else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,167 @@
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+BASE_ORDERS = 830
+BASE_CUSTOMERS = 91
+N_PRODUCTS = 77
+N_CATEGORIES = 8
+N_EMPLOYEES = 9
+N_SUPPLIERS = 29
+FIRST_ORDER_ID = 10248
+FIRST_ORDER_DATE = '1996-07-04'
+HISTORY_DAYS = 670
+DISCOUNTS = [0, 0.05, 0.1, 0.15, 0.2, 0.25]
+COUNTRIES = ['Germany', 'USA', 'Brazil', 'France', 'UK', 'Mexico', 'Spain', 'Venezuela', 'Italy',
+             'Canada', 'Argentina', 'Austria', 'Belgium', 'Denmark', 'Finland', 'Ireland', 'Norway',
+             'Poland', 'Portugal', 'Sweden', 'Switzerland']
+
+
+def _customers(rng, n_customers):
+    customer_ids = np.array([f'C{i:06d}' for i in range(n_customers)])
+    return pd.DataFrame({
+        'customer_id': customer_ids,
+        'company_name': [f'Company {i}' for i in range(n_customers)],
+        'contact_name': 'Contact',
+        'contact_title': 'Owner',
+        'address': 'Street 1',
+        'city': rng.choice(['Berlin', 'London', 'Madrid', 'Paris', 'São Paulo'], n_customers),
+        'region': None,
+        'postal_code': '00000',
+        'country': rng.choice(COUNTRIES, n_customers),
+        'phone': '000-0000',
+        'fax': None,
+    })
+
+
+def _products(rng):
+    product_ids = np.arange(1, N_PRODUCTS + 1)
+    return pd.DataFrame({
+        'product_id': product_ids,
+        'product_name': [f'Product {i}' for i in product_ids],
+        'supplier_id': rng.integers(1, N_SUPPLIERS + 1, N_PRODUCTS),
+        'category_id': rng.integers(1, N_CATEGORIES + 1, N_PRODUCTS),
+        'quantity_per_unit': '10 boxes',
+        'unit_price': rng.uniform(2, 100, N_PRODUCTS).round(2),
+        'units_in_stock': rng.integers(0, 120, N_PRODUCTS),
+        'units_on_order': rng.integers(0, 100, N_PRODUCTS),
+        'reorder_level': rng.integers(0, 30, N_PRODUCTS),
+        'discontinued': (rng.random(N_PRODUCTS) < 0.1).astype(int),
+    })
+
+
+def _orders(rng, n_orders, customer_ids):
+    offsets = np.sort(rng.integers(0, HISTORY_DAYS, n_orders))
+    order_date = pd.Timestamp(FIRST_ORDER_DATE) + pd.to_timedelta(offsets, unit='D')
+    shipped = order_date + pd.to_timedelta(rng.integers(1, 30, n_orders), unit='D')
+    return pd.DataFrame({
+        'order_id': np.arange(FIRST_ORDER_ID, FIRST_ORDER_ID + n_orders),
+        'customer_id': rng.choice(customer_ids, n_orders),
+        'employee_id': rng.integers(1, N_EMPLOYEES + 1, n_orders),
+        'order_date': order_date.strftime('%Y-%m-%d'),
+        'required_date': (order_date + pd.Timedelta(days=28)).strftime('%Y-%m-%d'),
+        'shipped_date': shipped.strftime('%Y-%m-%d'),
+        'ship_via': rng.integers(1, 4, n_orders),
+        'freight': rng.uniform(0, 500, n_orders).round(2),
+        'ship_name': 'Ship',
+        'ship_address': 'Street 1',
+        'ship_city': 'City',
+        'ship_region': None,
+        'ship_postal_code': '00000',
+        'ship_country': rng.choice(COUNTRIES, n_orders),
+    })
+
+
+def _order_details(rng, order_ids, products):
+    basket_sizes = rng.integers(1, 6, len(order_ids))
+    details = pd.DataFrame({
+        'order_id': np.repeat(order_ids, basket_sizes),
+        'product_id': rng.integers(1, N_PRODUCTS + 1, basket_sizes.sum()),
+    }).drop_duplicates(['order_id', 'product_id'], ignore_index=True)
+    prices = products.set_index('product_id')['unit_price']
+    details['unit_price'] = prices.reindex(details['product_id']).to_numpy()
+    details['quantity'] = rng.integers(1, 120, len(details))
+    details['discount'] = rng.choice(DISCOUNTS, len(details))
+    return details
+
+
+def generate_tables(scale=1, seed=0):
+    rng = np.random.default_rng(seed)
+    n_orders = int(BASE_ORDERS * scale)
+    n_customers = max(BASE_CUSTOMERS, int(BASE_CUSTOMERS * scale ** 0.5))
+
+    customers = _customers(rng, n_customers)
+    products = _products(rng)
+    orders = _orders(rng, n_orders, customers['customer_id'].to_numpy())
+
+    return {
+        'orders': orders,
+        'order_details': _order_details(rng, orders['order_id'].to_numpy(), products),
+        'products': products,
+        'customers': customers,
+        'employees': pd.DataFrame({
+            'employee_id': np.arange(1, N_EMPLOYEES + 1),
+            'last_name': 'Last',
+            'first_name': 'First',
+            'title': 'Sales Representative',
+            'reports_to': [np.nan] + [2] * (N_EMPLOYEES - 1),
+        }),
+        'categories': pd.DataFrame({
+            'category_id': np.arange(1, N_CATEGORIES + 1),
+            'category_name': [f'Category {i}' for i in range(1, N_CATEGORIES + 1)],
+            'description': 'Description',
+            'picture': '\\x',
+        }),
+        'suppliers': pd.DataFrame({
+            'supplier_id': np.arange(1, N_SUPPLIERS + 1),
+            'company_name': [f'Supplier {i}' for i in range(1, N_SUPPLIERS + 1)],
+            'country': rng.choice(COUNTRIES, N_SUPPLIERS),
+        }),
+        'shippers': pd.DataFrame({
+            'shipper_id': [1, 2, 3],
+            'company_name': ['Speedy Express', 'United Package', 'Federal Shipping'],
+            'phone': '000-0000',
+        }),
+        'territories': pd.DataFrame({
+            'territory_id': ['01581', '01730', '01833'],
+            'territory_description': ['Westboro', 'Bedford', 'Georgetow'],
+            'region_id': [1, 1, 1],
+        }),
+        'region': pd.DataFrame({
+            'region_id': [1, 2, 3, 4],
+            'region_description': ['Eastern', 'Western', 'Northern', 'Southern'],
+        }),
+        'us_states': pd.DataFrame({
+            'state_id': [1, 2],
+            'state_name': ['Alabama', 'Alaska'],
+            'state_abbr': ['AL', 'AK'],
+            'state_region': ['south', 'north'],
+        }),
+        'employee_territories': pd.DataFrame({
+            'employee_id': [1, 1, 2],
+            'territory_id': ['01581', '01730', '01833'],
+        }),
+    }
+
+
+def write_tables(tables, data_dir):
+    os.makedirs(data_dir, exist_ok=True)
+    for name, df in tables.items():
+        df.to_csv(os.path.join(data_dir, f'{name}.csv'), sep=';', index=False)
+
+
+def generate_dataset(data_dir, scale=1, seed=0):
+    tables = generate_tables(scale, seed)
+    write_tables(tables, data_dir)
+    return {name: len(df) for name, df in tables.items()}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Gera tabelas sintéticas no formato Northwind')
+    parser.add_argument('data_dir')
+    parser.add_argument('--scale', type=float, default=1)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    print(generate_dataset(args.data_dir, args.scale, args.seed))
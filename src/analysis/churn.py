@@ -0,0 +1,159 @@
+import numpy as np
+import pandas as pd
+
+DEFAULT_WINDOW_DAYS = 90
+RISK_BINS = [0, 30, 60, 90, float('inf')]
+RISK_LABELS = ['Baixo', 'Médio', 'Alto', 'Crítico']
+NS_PER_DAY = 86_400 * 10 ** 9
+# NaT como int64: pedido sem data ordena antes de todos os outros do cliente
+NAT_NS = np.iinfo(np.int64).min
+RFM_COLUMNS = ['first_order_date', 'last_order_date', 'recency_days', 'frequency', 'monetary']
+
+_ACTIVITY_CACHE = {}
+
+
+class CustomerActivity:
+    def __init__(self, customer_ids, codes, timestamps, values, latest=None):
+        # Pedidos ordenados por (cliente, data): cada cliente ocupa uma faixa contígua dos arrays
+        order = np.lexsort((timestamps, codes))
+        self._latest = latest
+        customer_range = np.arange(len(customer_ids))
+        self.customer_ids = customer_ids
+        self.timestamps = timestamps[order]
+        self.cumulative_values = np.concatenate([[0.0], np.cumsum(values[order])])
+        self.starts = np.searchsorted(codes[order], customer_range, side='left')
+        self.ends = np.searchsorted(codes[order], customer_range, side='right')
+        # Pedidos sem data abrem a faixa do cliente: contam em frequência e valor, não em recência
+        self.dated_starts = self.starts + np.bincount(codes[timestamps == NAT_NS], minlength=len(customer_ids))
+        self.dated = self.timestamps != NAT_NS
+
+    @classmethod
+    def from_orders(cls, orders, order_values=None):
+        codes, uniques = pd.factorize(orders['customer_id'], sort=True)
+        valid = codes >= 0
+        timestamps = orders['order_date'].to_numpy(dtype='datetime64[ns]').astype(np.int64)
+        if order_values is not None:
+            values = order_values.reindex(orders['order_id'].to_numpy()).fillna(0).to_numpy(dtype=np.float64)
+        else:
+            values = np.zeros(len(orders))
+        customer_ids = pd.Index(np.asarray(uniques), name='customer_id')
+        # A data de referência é o último pedido de todos, inclusive os sem cliente
+        latest = orders['order_date'].max()
+        return cls(customer_ids, codes[valid], timestamps[valid], values[valid],
+                   None if pd.isna(latest) else pd.Timestamp(latest))
+
+    @property
+    def latest(self):
+        if self._latest is not None:
+            return self._latest
+        return pd.Timestamp(self.timestamps[self.dated].max()) if self.dated.any() else None
+
+    def _last_position(self, cutoff):
+        # Busca binária vetorizada dentro da faixa de cada cliente
+        lo, hi = self.starts.copy(), self.ends.copy()
+        while True:
+            searching = lo < hi
+            if not searching.any():
+                return lo - 1
+            mid = np.where(searching, (lo + hi) // 2, 0)
+            go_right = searching & (self.timestamps[mid] <= cutoff)
+            lo = np.where(go_right, mid + 1, lo)
+            hi = np.where(searching & ~go_right, mid, hi)
+
+    def evaluate(self, as_of_dates=None):
+        if as_of_dates is None:
+            as_of_dates = [self.latest]
+        as_of = pd.DatetimeIndex(as_of_dates).as_unit('ns')
+        cutoffs = as_of.asi8
+        if len(self.timestamps):
+            last = np.column_stack([self._last_position(cutoff) for cutoff in cutoffs])
+        else:
+            last = np.full((len(self.customer_ids), len(cutoffs)), -1)
+
+        active = last >= self.dated_starts[:, None]
+        safe_last = np.where(active, last, 0)
+        last_ns = self.timestamps[safe_last] if len(self.timestamps) else np.zeros_like(last)
+        return {
+            'as_of': as_of,
+            'active': active,
+            'last_order_ns': np.where(active, last_ns, 0),
+            'recency_days': np.where(active, (cutoffs[None, :] - last_ns) // NS_PER_DAY, -1),
+            'frequency': np.where(active, last - self.starts[:, None] + 1, 0),
+            'monetary': np.where(active, self.cumulative_values[safe_last + 1]
+                                 - self.cumulative_values[self.starts][:, None], 0.0),
+        }
+
+    def rfm(self, as_of=None):
+        result = self.evaluate(None if as_of is None else [as_of])
+        active = result['active'][:, 0]
+        first_ns = self.timestamps[np.where(active, self.dated_starts, 0)] if len(self.timestamps) else 0
+        rfm = pd.DataFrame({
+            'first_order_date': pd.to_datetime(first_ns),
+            'last_order_date': pd.to_datetime(result['last_order_ns'][:, 0]),
+            'recency_days': result['recency_days'][:, 0],
+            'frequency': result['frequency'][:, 0],
+            'monetary': result['monetary'][:, 0],
+        }, index=self.customer_ids)[RFM_COLUMNS]
+        return rfm[active]
+
+    def churn_rates(self, windows=(DEFAULT_WINDOW_DAYS,), as_of_dates=None):
+        result = self.evaluate(as_of_dates)
+        active = result['active']
+        recency = result['recency_days']
+        n_active = active.sum(axis=0)
+        rates = {}
+        for window in windows:
+            churned = (active & (recency > window)).sum(axis=0)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                rates[window] = (churned / n_active) * 100
+        return pd.DataFrame(rates, index=pd.Index(result['as_of'], name='as_of'))
+
+    def backfill(self, windows=(DEFAULT_WINDOW_DAYS,), freq='ME'):
+        first, last = pd.Timestamp(self.timestamps[self.dated].min()), self.latest
+        as_of_dates = pd.date_range(first, last, freq=freq, normalize=True)
+        if not len(as_of_dates) or as_of_dates[-1] != last:
+            as_of_dates = as_of_dates.append(pd.DatetimeIndex([last]))
+        return self.churn_rates(windows, as_of_dates)
+
+    def cohort_retention(self, freq='M'):
+        codes = np.repeat(np.arange(len(self.customer_ids)), self.ends - self.starts)[self.dated]
+        periods = pd.PeriodIndex(pd.to_datetime(self.timestamps[self.dated]), freq=freq)
+        activity = pd.DataFrame({'customer': codes, 'period': periods.asi8}).drop_duplicates()
+        cohort = activity.groupby('customer')['period'].transform('min')
+        activity['cohort'] = cohort
+        activity['offset'] = activity['period'] - cohort
+        counts = activity.pivot_table(index='cohort', columns='offset', values='customer',
+                                      aggfunc='count', fill_value=0)
+        retention = counts.div(counts[0], axis=0)
+        retention.index = pd.PeriodIndex.from_ordinals(retention.index, freq=freq).rename('cohort')
+        retention.columns.name = 'periods_since_first_order'
+        return retention
+
+
+def get_customer_activity(orders, order_values=None):
+    cached_orders, cached_values, cached_activity = _ACTIVITY_CACHE.get('entry', (None, None, None))
+    # Sem valores (ex.: churn) serve a atividade já montada com valores para os mesmos pedidos
+    if cached_orders is orders and (cached_values is order_values or order_values is None):
+        return cached_activity
+    activity = CustomerActivity.from_orders(orders, order_values)
+    _ACTIVITY_CACHE['entry'] = (orders, order_values, activity)
+    return activity
+
+
+def get_risk_levels(recency_days):
+    return pd.cut(recency_days, bins=RISK_BINS, labels=RISK_LABELS)
+
+
+def summarize_risk(recency_days, order_count, customer_sales):
+    risk_levels = get_risk_levels(recency_days)
+    risk_dist = risk_levels.value_counts()
+    summary = pd.DataFrame({
+        'customers': risk_dist,
+        'share_pct': risk_dist / len(risk_levels) * 100,
+        'mean_orders': [order_count[risk_levels == risk].mean() for risk in risk_dist.index],
+        'mean_order_value': [customer_sales.loc[risk_levels == risk, ('total_sale', 'mean')].mean()
+                             for risk in risk_dist.index],
+        'total_value': [customer_sales.loc[risk_levels == risk, ('total_sale', 'sum')].sum()
+                        for risk in risk_dist.index],
+    }).rename_axis('risk')
+    return risk_levels, summary
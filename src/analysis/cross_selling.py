@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+
+from src.instrumentation import stage
+
+PAIR_COLUMNS = ['product_id_a', 'product_id_b', 'pair_count', 'support',
+                'confidence_a_b', 'confidence_b_a', 'lift']
+PAIR_CHUNK_SIZE = 1 << 22
+
+
+def count_pair_ids(order_ids, item_codes, n_items):
+    # Linhas ordenadas por (pedido, item). Cestas do mesmo tamanho formam uma matriz cestas x itens e
+    # triu_indices gera os pares de todas de uma vez; o par (a, b) vira o id a * n_items + b
+    starts = np.flatnonzero(np.concatenate([[True], order_ids[1:] != order_ids[:-1]]))
+    sizes = np.diff(np.append(starts, len(order_ids)))
+    chunk_ids, chunk_counts = [], []
+    for size in np.unique(sizes[sizes > 1]):
+        first, second = np.triu_indices(size, 1)
+        basket_starts = starts[sizes == size]
+        # Blocos de cestas limitam os pares materializados de uma vez
+        step = max(1, PAIR_CHUNK_SIZE // len(first))
+        for lo in range(0, len(basket_starts), step):
+            rows = item_codes[basket_starts[lo:lo + step, None] + np.arange(size)]
+            ids, counts = np.unique(rows[:, first] * n_items + rows[:, second], return_counts=True)
+            chunk_ids.append(ids)
+            chunk_counts.append(counts)
+    if not chunk_ids:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    ids, inverse = np.unique(np.concatenate(chunk_ids), return_inverse=True)
+    return ids, np.bincount(inverse, weights=np.concatenate(chunk_counts)).astype(np.int64)
+
+
+def count_product_pairs(order_details, min_support=1, top_k=None):
+    n_orders = order_details['order_id'].nunique()
+    item_counts = (order_details[['order_id', 'product_id']]
+                   .drop_duplicates()['product_id']
+                   .value_counts())
+
+    # Um par nunca é mais frequente que seus itens: poda antes de combinar
+    frequent_items = item_counts.index[item_counts >= min_support]
+    candidates = order_details[order_details['product_id'].isin(frequent_items)]
+
+    with stage('count_pairs', rows=len(candidates)):
+        baskets = candidates[['order_id', 'product_id']].drop_duplicates().dropna()
+        item_codes, items = pd.factorize(baskets['product_id'], sort=True)
+        order_ids = baskets['order_id'].to_numpy()
+        order = np.lexsort((item_codes, order_ids))
+        ids, counts = count_pair_ids(order_ids[order], item_codes[order].astype(np.int64), len(items))
+
+    keep = counts >= min_support
+    if not keep.any():
+        return pd.DataFrame(columns=PAIR_COLUMNS)
+
+    items = np.asarray(items)
+    result = pd.DataFrame({
+        'product_id_a': items[ids[keep] // len(items)],
+        'product_id_b': items[ids[keep] % len(items)],
+        'pair_count': counts[keep],
+    })
+    result = result.sort_values(['pair_count', 'product_id_a', 'product_id_b'],
+                                ascending=[False, True, True], ignore_index=True)
+    if top_k is not None:
+        result = result.head(top_k).copy()
+
+    count_a = item_counts.reindex(result['product_id_a']).to_numpy()
+    count_b = item_counts.reindex(result['product_id_b']).to_numpy()
+    result['support'] = result['pair_count'] / n_orders
+    result['confidence_a_b'] = result['pair_count'] / count_a
+    result['confidence_b_a'] = result['pair_count'] / count_b
+    result['lift'] = result['pair_count'] * n_orders / (count_a * count_b)
+    return result
@@ -0,0 +1,145 @@
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from src.etl.cache import get_cache_dir, replace_directory
+from src.etl.sales_fact import FACT_SOURCES, get_sales_fact
+from src.etl.sketches import estimate_cardinality, hash_values, register_updates
+from src.instrumentation import stage
+
+CUBE_KEYS = ['year_month', 'category_name', 'product_name', 'discontinued', 'ship_country']
+CUBE_MEASURES = ['revenue', 'quantity', 'discount_sum', 'lines']
+SKETCH_PRECISION = 8
+CUBE_DIRNAME = 'monthly_cube'
+CUBE_VERSION = 2
+
+_CUBE_CACHE = {}
+
+
+def _cell_sketches(cell_codes, values, n_cells):
+    registers = np.zeros((n_cells, 1 << SKETCH_PRECISION), dtype=np.uint8)
+    index, rank = register_updates(hash_values(values), SKETCH_PRECISION)
+    np.maximum.at(registers, (cell_codes, index), rank)
+    return registers
+
+
+class MonthlyCube:
+    def __init__(self, cells, order_sketches, customer_sketches, distinct_month, distinct_month_status):
+        self.cells = cells
+        self.order_sketches = order_sketches
+        self.customer_sketches = customer_sketches
+        # Contagens distintas exatas nos grãos usados pelos relatórios
+        self.distinct_month = distinct_month
+        self.distinct_month_status = distinct_month_status
+
+    def rollup(self, keys, approx_distinct=False):
+        keys = [keys] if isinstance(keys, str) else list(keys)
+        cells = self.cells
+        derived = set(keys) & {'year', 'month'}
+        # Pedido sem data fica numa célula de mês nulo, e .dt.year dela dá -1: sai do agrupamento
+        dated = cells['year_month'].notna().to_numpy() if derived else np.ones(len(cells), dtype=bool)
+        cells = cells[dated]
+        for key in derived:
+            cells = cells.assign(**{key: getattr(cells['year_month'].dt, key)})
+        grouper = cells.groupby(keys, observed=True, sort=True)
+        result = grouper[CUBE_MEASURES].sum()
+        if approx_distinct:
+            codes = grouper.ngroup().fillna(-1).to_numpy(np.intp)
+            valid = codes >= 0
+            for name, sketches in (('orders', self.order_sketches), ('customers', self.customer_sketches)):
+                merged = np.zeros((len(result), sketches.shape[1]), dtype=np.uint8)
+                np.maximum.at(merged, codes[valid], sketches[dated][valid])
+                result[f'{name}_approx'] = [estimate_cardinality(row) for row in merged]
+        return result
+
+    def save(self, cube_dir, signature):
+        # Montado num diretório temporário e trocado de uma vez: gravações concorrentes não se misturam
+        os.makedirs(os.path.dirname(cube_dir), exist_ok=True)
+        tmp_dir = tempfile.mkdtemp(prefix=f'{os.path.basename(cube_dir)}.', suffix='.tmp',
+                                   dir=os.path.dirname(cube_dir))
+        try:
+            self.cells.to_parquet(os.path.join(tmp_dir, 'cells.parquet'))
+            self.distinct_month.to_parquet(os.path.join(tmp_dir, 'distinct_month.parquet'))
+            self.distinct_month_status.to_parquet(os.path.join(tmp_dir, 'distinct_month_status.parquet'))
+            np.savez(os.path.join(tmp_dir, 'sketches.npz'),
+                     orders=self.order_sketches, customers=self.customer_sketches)
+            with open(os.path.join(tmp_dir, 'meta.json'), 'w', encoding='utf-8') as f:
+                json.dump({'version': CUBE_VERSION, 'sources': signature}, f, indent=2)
+        except BaseException:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+        replace_directory(tmp_dir, cube_dir)
+
+    @classmethod
+    def load(cls, cube_dir, signature=None):
+        meta_path = os.path.join(cube_dir, 'meta.json')
+        if not os.path.exists(meta_path):
+            return None
+        with open(meta_path, encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get('version') != CUBE_VERSION or (signature is not None and meta['sources'] != signature):
+            return None
+        sketches = np.load(os.path.join(cube_dir, 'sketches.npz'))
+        return cls(pd.read_parquet(os.path.join(cube_dir, 'cells.parquet')),
+                   sketches['orders'], sketches['customers'],
+                   pd.read_parquet(os.path.join(cube_dir, 'distinct_month.parquet')),
+                   pd.read_parquet(os.path.join(cube_dir, 'distinct_month_status.parquet')))
+
+
+def build_monthly_cube(fact):
+    # dropna=False: linha com chave nula (ex.: país em branco) vira célula própria e continua
+    # entrando nos totais por mês, categoria etc.; o rollup descarta o nulo só na chave agrupada
+    grouper = fact.groupby(CUBE_KEYS, observed=True, sort=True, dropna=False)
+    with stage('cube_measures', rows=len(fact)):
+        cells = grouper.agg(
+            revenue=('total_sale', 'sum'),
+            quantity=('quantity', 'sum'),
+            discount_sum=('discount', 'sum'),
+            lines=('order_id', 'size'),
+        ).reset_index()
+
+    with stage('cube_sketches', rows=len(fact)):
+        codes = grouper.ngroup().fillna(-1).to_numpy(np.intp)
+        valid = codes >= 0
+        order_sketches = _cell_sketches(codes[valid], fact['order_id'].to_numpy()[valid], len(cells))
+        customer_sketches = _cell_sketches(codes[valid], fact['customer_id'].to_numpy()[valid], len(cells))
+
+    distinct_month = fact.groupby('year_month').agg(
+        orders=('order_id', 'nunique'), customers=('customer_id', 'nunique'))
+    distinct_month_status = fact.groupby(['year_month', 'discontinued']).agg(orders=('order_id', 'nunique'))
+    return MonthlyCube(cells, order_sketches, customer_sketches, distinct_month, distinct_month_status)
+
+
+def source_signature(data):
+    # A dos dados em memória: reler os arquivos agora gravaria um cubo antigo sob a assinatura nova
+    return data.source_signature(FACT_SOURCES)
+
+
+def get_cube_dir(data_dir):
+    return os.path.join(get_cache_dir(data_dir), CUBE_DIRNAME)
+
+
+def get_monthly_cube(data, persist=True):
+    # O cubo gravado em disco cobre o histórico inteiro: dados filtrados montam o seu só em memória
+    if getattr(data, 'filters', None):
+        persist = False
+    data_dir = getattr(data, 'data_dir', None) if persist else None
+    signature = source_signature(data) if data_dir else None
+    cached_data, cached_signature, cached_cube = _CUBE_CACHE.get('entry', (None, None, None))
+    if cached_data is data and cached_signature == signature:
+        return cached_cube
+
+    cube = MonthlyCube.load(get_cube_dir(data_dir), signature) if data_dir else None
+    if cube is None:
+        with stage('build_monthly_cube') as frame:
+            cube = build_monthly_cube(get_sales_fact(data))
+            frame['rows'] = len(cube.cells)
+        if data_dir:
+            cube.save(get_cube_dir(data_dir), signature)
+
+    _CUBE_CACHE['entry'] = (data, signature, cube)
+    return cube
@@ -1,211 +1,131 @@
-from src.etl.data_loader import load_all_data
 from src.etl.data_quality import check_data_quality
+from src.etl.sales_fact import FACT_COLUMNS, FACT_SOURCES, get_order_values, get_sales_fact
+from src.etl.shared_store import get_loader
+from src.analysis.churn import DEFAULT_WINDOW_DAYS, get_customer_activity, summarize_risk
+from src.analysis.cross_selling import count_product_pairs
+from src.analysis.cube import get_monthly_cube
+from src.analysis.kpis import analyze_churn, analyze_ticket_medio
+from src.analysis.renderers import render_console, render_report
+from src.analysis.result_cache import ResultCache, get_result_cache_dir
+from src.analysis.results import AnalysisResult
+from src.analysis.runner import run_analyses
+from src.instrumentation import disable_tracing, enable_tracing, stage
+import os
 import pandas as pd
 from datetime import datetime
 
-
-def analyze_ticket_medio(orders, order_details):
-    order_details['total'] = order_details['unit_price'] * order_details['quantity'] * (1 - order_details['discount'])
-    order_values = order_details.groupby('order_id')['total'].sum()
-    return order_values.mean()
-
-def analyze_churn(orders, window_days=90):
-    orders['order_date'] = pd.to_datetime(orders['order_date'])
-    last_order_date = orders.groupby('customer_id')['order_date'].max()
-    latest_date = orders['order_date'].max()
-    churned = (latest_date - last_order_date).dt.days > window_days
-    return (churned.sum() / len(churned)) * 100
+ANALYSIS_COLUMNS = dict(FACT_COLUMNS, customers=['customer_id', 'company_name'])
+PRODUCT_STATUSES = {0: 'active', 1: 'inactive'}
+BACKENDS = ('pandas', 'sql', 'duckdb', 'sqlite')
 
 
 def analyze_sales_performance(data):
-    order_details = data['order_details']
-    products = data['products']
-    categories = data['categories']
-    order_details['total_sale'] = order_details['unit_price'] * order_details['quantity'] * (
-                1 - order_details['discount'])
-    sales_by_product = (order_details
-                        .merge(products, on='product_id')
-                        .merge(categories, on='category_id')
-                        .groupby(['category_name', 'product_name'])
+    sales_data = get_sales_fact(data)
+    sales_by_product = (sales_data
+                        .groupby(['category_name', 'product_name'], observed=True)
                         .agg({
         'total_sale': 'sum',
         'quantity': 'sum'
     })
                         .sort_values('total_sale', ascending=False)
                         )
+    category_sales = (sales_by_product.groupby('category_name', observed=True).sum()
+                      .sort_values('total_sale', ascending=False))
 
-    print("\n" + "=" * 50)
-    print(" " * 15 + "ANÁLISE DE VENDAS")
-    print("=" * 50 + "\n")
-    print("Top 10 Produtos por Receita:")
-    print(sales_by_product.head(10))
-    category_sales = sales_by_product.groupby('category_name').sum()
-    print("\nVendas por Categoria:")
-    print(category_sales.sort_values('total_sale', ascending=False))
-
-    return sales_by_product
+    return AnalysisResult('sales_performance', "ANÁLISE DE VENDAS", tables={
+        'sales_by_product': sales_by_product,
+        'category_sales': category_sales,
+    })
 
 
 def analyze_active_vs_inactive_products(data):
-    orders = data['orders'].copy()
-    order_details = data['order_details'].copy()
-    products = data['products'].copy()
-    categories = data['categories'].copy()
-
-    order_details['total_sale'] = order_details['unit_price'] * order_details['quantity'] * (
-                1 - order_details['discount'])
-
-    sales_data = (order_details
-                  .merge(products, on='product_id')
-                  .merge(categories, on='category_id')
-                  .merge(orders, on='order_id'))
-
-    sales_data['order_date'] = pd.to_datetime(sales_data['order_date'])
-    sales_data['year_month'] = sales_data['order_date'].dt.to_period('M')
-
-    for status in [0, 1]:
-        status_name = "ATIVOS" if status == 0 else "INATIVOS"
-        df_status = sales_data.loc[sales_data['discontinued'] == status].copy()
-
-        print("\n" + "=" * 50)
-        print(f" ANÁLISE DE PRODUTOS {status_name}")
-        print("=" * 50)
-
-        print("\n1. Métricas Gerais:")
-        print(f"Total de produtos: {len(df_status['product_id'].unique())}")
-        print(f"Total de vendas: R$ {df_status['total_sale'].sum():,.2f}")
-        print(f"Ticket médio: R$ {df_status['total_sale'].mean():,.2f}")
-        print(f"Quantidade total vendida: {df_status['quantity'].sum():,}")
-
-        print("\n2. Top 5 Produtos por Receita:")
-        top_products = (df_status.groupby('product_name')
-                        .agg({
+    sales_data = get_sales_fact(data)
+    cube = get_monthly_cube(data)
+    monthly_by_status = cube.rollup(['discontinued', 'year_month'])
+    monthly_orders = cube.distinct_month_status['orders']
+
+    tables = {}
+    metrics = {}
+    for status, prefix in PRODUCT_STATUSES.items():
+        df_status = sales_data.loc[sales_data['discontinued'] == status]
+
+        metrics[f'{prefix}_products'] = len(df_status['product_id'].unique())
+        metrics[f'{prefix}_total_sale'] = df_status['total_sale'].sum()
+        metrics[f'{prefix}_ticket'] = df_status['total_sale'].mean()
+        metrics[f'{prefix}_quantity'] = df_status['quantity'].sum()
+
+        tables[f'{prefix}_top_products'] = (df_status.groupby('product_name', observed=True)
+                                            .agg({
             'total_sale': 'sum',
             'quantity': 'sum'
         })
-                        .sort_values('total_sale', ascending=False)
-                        .head())
-        print(top_products)
+                                            .sort_values('total_sale', ascending=False)
+                                            .head())
 
-        print("\n3. Vendas por Categoria:")
-        category_analysis = (df_status.groupby('category_name')
-                             .agg({
+        tables[f'{prefix}_categories'] = (df_status.groupby('category_name', observed=True)
+                                          .agg({
             'total_sale': 'sum',
             'quantity': 'sum',
             'product_id': 'nunique'
         })
-                             .round(2)
-                             .sort_values('total_sale', ascending=False))
-        print(category_analysis)
-
-        print("\n4. Tendência de Vendas por Ano-Mês:")
-        temporal_analysis = (df_status.groupby('year_month')
-                             .agg({
-            'total_sale': 'sum',
-            'order_id': 'nunique'
+                                          .round(2)
+                                          .sort_values('total_sale', ascending=False))
+
+        status_months = monthly_by_status[monthly_by_status.index.get_level_values('discontinued') == status]
+        tables[f'{prefix}_monthly'] = pd.DataFrame({
+            'total_sale': status_months['revenue'].droplevel('discontinued'),
+            'order_id': monthly_orders[monthly_orders.index.get_level_values('discontinued') == status]
+                        .droplevel('discontinued')
         })
-                             .tail())
-        print(temporal_analysis)
 
-        print("\n5. Impacto dos Descontos:")
-        discount_analysis = (df_status.groupby('discount')
-                             .agg({
+        tables[f'{prefix}_discounts'] = (df_status.groupby('discount')
+                                         .agg({
             'total_sale': 'sum',
             'quantity': 'sum'
         })
-                             .sort_values('total_sale', ascending=False))
-        print(discount_analysis)
+                                         .sort_values('total_sale', ascending=False))
 
-    print("\n" + "=" * 50)
-    print(" COMPARATIVO FINAL ATIVOS VS INATIVOS")
-    print("=" * 50)
-
-    comparative = pd.DataFrame({
+    tables['comparative'] = pd.DataFrame({
         'Métrica': ['Total Produtos', 'Total Vendas', 'Ticket Médio', 'Qtd Total'],
-        'Ativos': [
-            len(sales_data[sales_data['discontinued'] == 0]['product_id'].unique()),
-            sales_data[sales_data['discontinued'] == 0]['total_sale'].sum(),
-            sales_data[sales_data['discontinued'] == 0]['total_sale'].mean(),
-            sales_data[sales_data['discontinued'] == 0]['quantity'].sum()
-        ],
-        'Inativos': [
-            len(sales_data[sales_data['discontinued'] == 1]['product_id'].unique()),
-            sales_data[sales_data['discontinued'] == 1]['total_sale'].sum(),
-            sales_data[sales_data['discontinued'] == 1]['total_sale'].mean(),
-            sales_data[sales_data['discontinued'] == 1]['quantity'].sum()
-        ]
+        'Ativos': [metrics[f'active_{key}'] for key in ('products', 'total_sale', 'ticket', 'quantity')],
+        'Inativos': [metrics[f'inactive_{key}'] for key in ('products', 'total_sale', 'ticket', 'quantity')],
     })
 
-    comparative['Ativos'] = comparative.apply(
-        lambda x: f"{x['Ativos']:,.2f}" if isinstance(x['Ativos'], (float, int)) else x['Ativos'], axis=1)
-    comparative['Inativos'] = comparative.apply(
-        lambda x: f"{x['Inativos']:,.2f}" if isinstance(x['Inativos'], (float, int)) else x['Inativos'], axis=1)
+    return AnalysisResult('active_vs_inactive_products', "COMPARATIVO FINAL ATIVOS VS INATIVOS",
+                          tables=tables, metrics=metrics)
 
-    print("\nComparativo Final:")
-    print(comparative.to_string(index=False))
 
 def analyze_product_status(data):
-    order_details = data['order_details'].copy()
-    products = data['products'].copy()
-
-    order_details['total_sale'] = order_details['unit_price'] * order_details['quantity'] * (
-                1 - order_details['discount'])
+    sales_data = get_sales_fact(data)
 
-    sales_by_status = (order_details
-    .merge(products, on='product_id')
+    sales_by_status = (sales_data
     .groupby('discontinued')
     .agg({
         'total_sale': 'sum',
         'quantity': 'sum'
     }))
 
-    print("\n" + "=" * 50)
-    print(" " * 15 + "ANÁLISE POR STATUS DO PRODUTO")
-    print("=" * 50 + "\n")
-    print("Vendas por Status do Produto:")
-    print("\nProdutos Ativos (0):")
-    if 0 in sales_by_status.index:
-        print(f"Total vendas: R$ {sales_by_status.loc[0, 'total_sale']:,.2f}")
-        print(f"Quantidade vendida: {sales_by_status.loc[0, 'quantity']:,}")
+    return AnalysisResult('product_status', "ANÁLISE POR STATUS DO PRODUTO",
+                          tables={'sales_by_status': sales_by_status})
 
-    print("\nProdutos Inativos (1):")
-    if 1 in sales_by_status.index:
-        print(f"Total vendas: R$ {sales_by_status.loc[1, 'total_sale']:,.2f}")
-        print(f"Quantidade vendida: {sales_by_status.loc[1, 'quantity']:,}")
 
 def analyze_seasonality(data):
-    orders = data['orders'].copy()
-    order_details = data['order_details'].copy()
-    orders['order_date'] = pd.to_datetime(orders['order_date'])
-    orders['month'] = orders['order_date'].dt.month
-    orders['year'] = orders['order_date'].dt.year
-    order_details['total_sale'] = order_details['unit_price'] * order_details['quantity'] * (
-                1 - order_details['discount'])
-
-    sales_by_month = (order_details
-                      .merge(orders, on='order_id')
-                      .groupby(['year', 'month'])
-                      ['total_sale'].sum()
-                      .reset_index()
-                      )
+    monthly = get_monthly_cube(data).rollup(['year', 'month'])
 
-    print("\n" + "=" * 50)
-    print(" " * 15 + "ANÁLISE DE SAZONALIDADE")
-    print("=" * 50 + "\n")
-    print("Vendas por Mês:")
-    print(sales_by_month.sort_values('total_sale', ascending=False))
+    sales_by_month = pd.DataFrame({
+        'year': monthly.index.get_level_values('year'),
+        'month': monthly.index.get_level_values('month'),
+        'total_sale': monthly['revenue'].to_numpy()
+    })
 
-    return sales_by_month
+    return AnalysisResult('seasonality', "ANÁLISE DE SAZONALIDADE",
+                          tables={'sales_by_month': sales_by_month})
 
 
 def analyze_geographic_distribution(data):
-    orders = data['orders'].copy()
-    order_details = data['order_details'].copy()
-    order_details['total_sale'] = order_details['unit_price'] * order_details['quantity'] * (
-                1 - order_details['discount'])
-    sales_by_country = (order_details
-                        .merge(orders, on='order_id')
-                        .groupby('ship_country')
+    sales_data = get_sales_fact(data)
+    sales_by_country = (sales_data
+                        .groupby('ship_country', observed=True)
                         .agg({
         'total_sale': 'sum',
         'order_id': 'count'
@@ -214,286 +134,303 @@ def analyze_geographic_distribution(data):
                         .sort_values('total_sale', ascending=False)
                         )
 
-    print("\n" + "=" * 50)
-    print(" " * 10 + "ANÁLISE DE DISTRIBUIÇÃO GEOGRÁFICA")
-    print("=" * 50 + "\n")
-    print("Vendas por País:")
-    print(sales_by_country)
-
-    return sales_by_country
+    return AnalysisResult('geographic_distribution', "ANÁLISE DE DISTRIBUIÇÃO GEOGRÁFICA",
+                          tables={'sales_by_country': sales_by_country})
 
 
-def analyze_cross_selling(data):
-    orders = data['orders'].copy()
-    order_details = data['order_details'].copy()
-    products = data['products'].copy()
+def analyze_cross_selling(data, min_support=1):
+    order_details = data['order_details']
+    products = data['products']
 
-    order_details['total_sale'] = order_details['unit_price'] * order_details['quantity'] * (
-                1 - order_details['discount'])
-    discount_analysis = order_details.groupby('discount').agg({
+    sales_data = get_sales_fact(data)
+    discount_analysis = sales_data.groupby('discount').agg({
         'quantity': 'sum',
         'total_sale': 'sum'
     }).sort_values('total_sale', ascending=False)
-    products = products[['product_id', 'product_name']]  # Simplifica para evitar duplicação
-    order_pairs = (order_details.merge(order_details, on='order_id')
-                   .query('product_id_x < product_id_y')
-                   .merge(products, left_on='product_id_x', right_on='product_id', suffixes=('', '_x'))
-                   .merge(products, left_on='product_id_y', right_on='product_id', suffixes=('', '_y')))
-
-    frequent_pairs = (order_pairs.groupby(['product_name', 'product_name_y'])
-                      .size()
-                      .sort_values(ascending=False))
-
-    pairs_df = pd.DataFrame(frequent_pairs).reset_index()
-    pairs_df.columns = ['Produto 1', 'Produto 2', 'Frequência']
-
-    print("\nImpacto dos Descontos:")
-    print(discount_analysis)
-
-    print("\nTop 10 Pares de Produtos:")
-    print(pairs_df.head(10).to_string(index=False))
+    product_names = products.set_index('product_id')['product_name']
+    pairs = count_product_pairs(order_details, min_support=min_support)
+
+    product_pairs = pd.DataFrame({
+        'product_a': product_names.reindex(pairs['product_id_a']).to_numpy(),
+        'product_b': product_names.reindex(pairs['product_id_b']).to_numpy(),
+        'frequency': pairs['pair_count'].to_numpy(),
+        'support': pairs['support'].to_numpy(),
+        'lift': pairs['lift'].to_numpy(),
+    })
 
-    return discount_analysis, frequent_pairs
+    return AnalysisResult('cross_selling', "CROSS-SELLING", tables={
+        'discount_analysis': discount_analysis,
+        'product_pairs': product_pairs,
+    })
 
 
 def analyze_customer_behavior(data):
-    orders = data['orders'].copy()
-    order_details = data['order_details'].copy()
-    customers = data['customers'].copy()
-    orders['order_date'] = pd.to_datetime(orders['order_date'])
-    customer_frequency = orders.groupby('customer_id').agg({
-        'order_id': 'count',
-        'order_date': ['min', 'max']
-    })
+    orders = data['orders']
+    customers = data['customers']
+    order_counts = orders.groupby('customer_id', observed=True)['order_id'].count()
+    freq_stats = order_counts.describe().round(2)
 
-    freq_stats = customer_frequency['order_id']['count'].describe().round(2)
-
-    print("\n" + "=" * 50)
-    print(" " * 15 + "ANÁLISE DE CLIENTES")
-    print("=" * 50)
-
-    print("\nPerfil de Compras dos Clientes:")
-    print(f"\nTotal de clientes ativos: {freq_stats['count']:.0f}")
-    print(f"Número médio de pedidos por cliente: {freq_stats['mean']:.1f}")
-    print("\nSegmentação por frequência de compra:")
-    print(
-        f"- Clientes de baixa frequência (1-4 pedidos): {len(customer_frequency[customer_frequency['order_id']['count'] <= 4])} clientes")
-    print(
-        f"- Clientes de média frequência (5-12 pedidos): {len(customer_frequency[(customer_frequency['order_id']['count'] > 4) & (customer_frequency['order_id']['count'] <= 12)])} clientes")
-    print(
-        f"- Clientes de alta frequência (>12 pedidos): {len(customer_frequency[customer_frequency['order_id']['count'] > 12])} clientes")
-    print(f"\nCliente mais frequente: {freq_stats['max']:.0f} pedidos")
-
-    order_details['total_sale'] = order_details['unit_price'] * order_details['quantity'] * (
-                1 - order_details['discount'])
-    customer_value = (order_details.merge(orders, on='order_id')
+    customer_value = (get_sales_fact(data)
+                      .groupby('customer_id', observed=True)['total_sale'].sum()
+                      .reset_index()
                       .merge(customers[['customer_id', 'company_name']], on='customer_id')
-                      .groupby(['customer_id', 'company_name'])
-                      .agg({'total_sale': 'sum'})
+                      .set_index(['customer_id', 'company_name'])
+                      .sort_index()
+                      [['total_sale']]
                       .round(2))
 
-    print("\nTop 10 Clientes por Valor Total de Compras:")
-    top_customers = customer_value.sort_values('total_sale', ascending=False).head(10)
-    print(top_customers.to_string(float_format=lambda x: f"R$ {x:,.2f}"))
+    return AnalysisResult('customer_behavior', "ANÁLISE DE CLIENTES", tables={
+        'customer_value': customer_value,
+    }, metrics={
+        'active_customers': freq_stats['count'],
+        'mean_orders': freq_stats['mean'],
+        'max_orders': freq_stats['max'],
+        'low_frequency_customers': int((order_counts <= 4).sum()),
+        'medium_frequency_customers': int(((order_counts > 4) & (order_counts <= 12)).sum()),
+        'high_frequency_customers': int((order_counts > 12).sum()),
+    })
 
 
 def analyze_customer_patterns(data):
-    orders = data['orders'].copy()
-    order_details = data['order_details'].copy()
-    order_details['total_sale'] = order_details['unit_price'] * order_details['quantity'] * (
-                1 - order_details['discount'])
-    order_values = order_details.groupby('order_id')['total_sale'].sum()
+    orders = data['orders']
+    order_values = get_order_values(data)
     orders_with_values = orders.merge(order_values.reset_index(), on='order_id')
 
-    orders['order_date'] = pd.to_datetime(orders['order_date'])
-    customer_orders = orders.groupby('customer_id').agg({
-        'order_id': 'count',
-        'order_date': lambda x: (x.max() - x.min()).days
-    }).rename(columns={'order_date': 'customer_lifetime_days'})
+    rfm = get_customer_activity(orders, order_values).rfm()
+    customer_orders = pd.DataFrame({
+        'order_id': rfm['frequency'],
+        'customer_lifetime_days': (rfm['last_order_date'] - rfm['first_order_date']).dt.days,
+    })
 
     customer_orders['segment'] = pd.cut(customer_orders['order_id'],
                                         bins=[0, 4, 12, float('inf')],
                                         labels=['Baixa', 'Média', 'Alta'])
 
-    last_order_date = orders.groupby('customer_id')['order_date'].max()
-    last_order_overall = orders['order_date'].max()
-    days_since_last = (last_order_overall - last_order_date).dt.days
-
-    churned_customers = days_since_last[days_since_last > 90]
+    days_since_last = rfm['recency_days']
+    churned_customers = days_since_last[days_since_last > DEFAULT_WINDOW_DAYS]
 
     churned_values = (orders_with_values[orders_with_values['customer_id'].isin(churned_customers.index)]
-    .groupby('customer_id')
+    .groupby('customer_id', observed=True)
     .agg({
         'total_sale': ['count', 'mean', 'sum']
     }))
 
-    print("\n" + "=" * 50)
-    print(" " * 15 + "PADRÕES DE CLIENTES")
-    print("=" * 50)
-
-    print("\nPadrões por Segmento:")
-    segment_stats = customer_orders.groupby('segment').agg({
+    segment_stats = customer_orders.groupby('segment', observed=False).agg({
         'order_id': ['count', 'mean'],
         'customer_lifetime_days': 'mean'
     }).round(1)
-    print(segment_stats)
 
-    print("\nAnálise de Clientes Inativos (>90 dias):")
-    print(f"Total de clientes inativos: {len(churned_customers)}")
-    print(f"Valor médio por pedido dos inativos: R$ {churned_values['total_sale']['mean'].mean():.2f}")
-    print(f"Valor total perdido: R$ {churned_values['total_sale']['sum'].sum():.2f}")
+    return AnalysisResult('customer_patterns', "PADRÕES DE CLIENTES", tables={
+        'segment_stats': segment_stats,
+        'churned_values': churned_values,
+    }, metrics={
+        'window_days': DEFAULT_WINDOW_DAYS,
+        'churned_customers': len(churned_customers),
+        'churned_mean_order_value': churned_values['total_sale']['mean'].mean(),
+        'churned_total_value': churned_values['total_sale']['sum'].sum(),
+    })
 
 
 def analyze_temporal_patterns(data):
-    orders = data['orders'].copy()
-    order_details = data['order_details'].copy()
-    products = data['products'].copy()
-    categories = data['categories'].copy()
-
-    orders['order_date'] = pd.to_datetime(orders['order_date'])
-    order_details['total_sale'] = order_details['unit_price'] * order_details['quantity'] * (
-                1 - order_details['discount'])
-
-    sales_data = (order_details.merge(orders, on='order_id')
-                  .merge(products, on='product_id')
-                  .merge(categories, on='category_id'))
-
-    sales_data['year_month'] = sales_data['order_date'].dt.to_period('M')
-
-    monthly_metrics = sales_data.groupby('year_month').agg({
-        'total_sale': ['sum', 'mean'],
-        'order_id': 'nunique',
-        'customer_id': 'nunique'
+    cube = get_monthly_cube(data)
+    monthly = cube.rollup('year_month')
+
+    monthly_metrics = pd.DataFrame({
+        ('total_sale', 'sum'): monthly['revenue'],
+        ('total_sale', 'mean'): monthly['revenue'] / monthly['lines'],
+        ('order_id', 'nunique'): cube.distinct_month['orders'],
+        ('customer_id', 'nunique'): cube.distinct_month['customers']
     }).round(2)
 
-    category_monthly = (sales_data.groupby(['year_month', 'category_name'])['total_sale']
-                        .sum()
+    category_monthly = (cube.rollup(['year_month', 'category_name'])['revenue']
+                        .rename('total_sale')
                         .unstack()
                         .fillna(0))
 
-    print("\n" + "=" * 50)
-    print(" " * 15 + "ANÁLISE TEMPORAL")
-    print("=" * 50)
-
-    print("\nMétricas Mensais:")
-    print(monthly_metrics)
-
-    print("\nTop 3 Meses por Receita:")
-    top_months = monthly_metrics.sort_values(('total_sale', 'sum'), ascending=False).head(3)
-    print(top_months)
-
-    print("\nCrescimento Mês a Mês (%):")
-    monthly_growth = monthly_metrics[('total_sale', 'sum')].pct_change() * 100
-    print(monthly_growth.tail().round(2))
+    return AnalysisResult('temporal_patterns', "ANÁLISE TEMPORAL", tables={
+        'monthly_metrics': monthly_metrics,
+        'top_months': monthly_metrics.sort_values(('total_sale', 'sum'), ascending=False).head(3),
+        'monthly_growth': (monthly_metrics[('total_sale', 'sum')].pct_change() * 100).rename('growth_pct'),
+        'category_monthly': category_monthly,
+    })
 
 
 def analyze_category_seasonality(data):
-    orders = data['orders'].copy()
-    order_details = data['order_details'].copy()
-    products = data['products'].copy()
-    categories = data['categories'].copy()
-
-    orders['order_date'] = pd.to_datetime(orders['order_date'])
-    order_details['total_sale'] = order_details['unit_price'] * order_details['quantity'] * (
-                1 - order_details['discount'])
-
-    sales_data = (order_details.merge(orders, on='order_id')
-                  .merge(products, on='product_id')
-                  .merge(categories, on='category_id'))
-
-    sales_data['month'] = sales_data['order_date'].dt.month
+    cube = get_monthly_cube(data)
 
-    category_season = (sales_data.groupby(['category_name', 'month'])
-                       .agg({
-        'total_sale': 'sum',
-        'quantity': 'sum',
-        'discount': 'mean'
-    })
-                       .round(2))
-
-    discount_impact = (sales_data.groupby('category_name')
-                       .agg({
-        'discount': 'mean',
-        'total_sale': 'sum',
-        'quantity': 'sum'
+    by_month = cube.rollup(['category_name', 'month'])
+    category_season = pd.DataFrame({
+        'total_sale': by_month['revenue'],
+        'quantity': by_month['quantity'],
+        'discount': by_month['discount_sum'] / by_month['lines']
+    }).round(2)
+    best_months = category_season.loc[
+        category_season.groupby(level='category_name', observed=True, sort=False)['total_sale'].idxmax()]
+
+    by_category = cube.rollup('category_name')
+    discount_impact = (pd.DataFrame({
+        'discount': by_category['discount_sum'] / by_category['lines'],
+        'total_sale': by_category['revenue'],
+        'quantity': by_category['quantity']
     })
                        .sort_values('total_sale', ascending=False)
                        .round(2))
 
-    print("\n" + "=" * 50)
-    print(" " * 10 + "ANÁLISE DE SAZONALIDADE E DESCONTOS")
-    print("=" * 50)
-
-    print("\nMeses Mais Fortes por Categoria:")
-    for category in sales_data['category_name'].unique():
-        cat_data = category_season.loc[category]
-        best_month = cat_data['total_sale'].idxmax()
-        print(f"\n{category}:")
-        print(f"Melhor mês: {best_month}")
-        print(f"Vendas: R$ {cat_data.loc[best_month, 'total_sale']:,.2f}")
-        print(f"Desconto médio: {cat_data.loc[best_month, 'discount'] * 100:.1f}%")
-
-    print("\nImpacto dos Descontos por Categoria:")
-    print(discount_impact)
+    return AnalysisResult('category_seasonality', "ANÁLISE DE SAZONALIDADE E DESCONTOS", tables={
+        'category_season': category_season,
+        'best_months': best_months,
+        'discount_impact': discount_impact,
+    })
 
 
 def analyze_churn_risk(data):
-    orders = data['orders'].copy()
-    order_details = data['order_details'].copy()
+    orders = data['orders']
+    sales_data = get_sales_fact(data)
 
-    orders['order_date'] = pd.to_datetime(orders['order_date'])
-    order_details['total_sale'] = order_details['unit_price'] * order_details['quantity'] * (
-                1 - order_details['discount'])
-
-    order_count = orders.groupby('customer_id')['order_id'].nunique()
-    last_order_date = orders.groupby('customer_id')['order_date'].max()
-    customer_sales = order_details.merge(orders, on='order_id').groupby('customer_id').agg({
+    rfm = get_customer_activity(orders, get_order_values(data)).rfm()
+    order_count = rfm['frequency']
+    customer_sales = sales_data.groupby('customer_id', observed=True).agg({
         'total_sale': ['mean', 'sum'],
         'discount': 'mean'
     })
 
-    last_order_overall = orders['order_date'].max()
-    days_since_last = (last_order_overall - last_order_date).dt.days
-
-    risk_levels = pd.cut(
-        days_since_last,
-        bins=[0, 30, 60, 90, float('inf')],
-        labels=['Baixo', 'Médio', 'Alto', 'Crítico']
-    )
-
-    print("\n" + "=" * 50)
-    print(" " * 15 + "ANÁLISE DE RISCO DE CHURN")
-    print("=" * 50)
-
-    print("\nDistribuição de Risco:")
-    risk_dist = risk_levels.value_counts()
-    for risk, count in risk_dist.items():
-        print(f"{risk}: {count} clientes ({count / len(risk_levels) * 100:.1f}%)")
-        print(f"- Média de pedidos: {order_count[risk_levels == risk].mean():.1f}")
-        print(
-            f"- Valor médio por pedido: R${customer_sales.loc[risk_levels == risk, ('total_sale', 'mean')].mean():.2f}")
-        print(f"- Valor total: R${customer_sales.loc[risk_levels == risk, ('total_sale', 'sum')].sum():.2f}\n")
-
-    return risk_levels
-
-def main():
-    data = load_all_data()
-    #check_data_quality(data)
-    analyze_sales_performance(data)
-    analyze_active_vs_inactive_products(data)
-    analyze_seasonality(data)
-    analyze_geographic_distribution(data)
-    analyze_cross_selling(data)
-    analyze_customer_behavior(data)
-    analyze_customer_patterns(data)
-    analyze_temporal_patterns(data)
-    analyze_category_seasonality(data)
-    analyze_churn_risk(data)
-    ticket_medio = analyze_ticket_medio(data['orders'], data['order_details'])
-    churn_rate = analyze_churn(data['orders'])
-    print(f'Ticket Médio: R${ticket_medio:.2f}')
-    print(f'Taxa de Churn: {churn_rate:.2f}%')
+    risk_levels, risk_summary = summarize_risk(rfm['recency_days'], order_count, customer_sales)
+
+    return AnalysisResult('churn_risk', "ANÁLISE DE RISCO DE CHURN", tables={
+        'risk_summary': risk_summary,
+        'customer_risk': rfm.assign(risk=risk_levels),
+    })
+
+ANALYSES = [
+    analyze_sales_performance,
+    analyze_active_vs_inactive_products,
+    analyze_seasonality,
+    analyze_geographic_distribution,
+    analyze_cross_selling,
+    analyze_customer_behavior,
+    analyze_customer_patterns,
+    analyze_temporal_patterns,
+    analyze_category_seasonality,
+    analyze_churn_risk,
+]
+
+# Tabelas lidas por cada análise: definem quando um resultado em cache deixa de valer
+ANALYSIS_INPUTS = {analysis.__name__: list(FACT_SOURCES) for analysis in ANALYSES}
+ANALYSIS_INPUTS[analyze_customer_behavior.__name__] = list(FACT_SOURCES) + ['customers']
+
+
+def _prepare_shared(data):
+    # Tabela fato, cubo e atividade dos clientes montados uma vez no processo pai, antes do fork
+    get_sales_fact(data)
+    get_monthly_cube(data)
+    get_customer_activity(data['orders'], get_order_values(data))
+
+
+def _run_pandas(data, workers, mode, cache):
+    with stage('run_analyses'):
+        results = run_analyses(data, ANALYSES, workers=workers, mode=mode,
+                               cache=cache, inputs=ANALYSIS_INPUTS, prepare=_prepare_shared)
+    with stage('analyze_ticket_medio'):
+        if cache is None:
+            ticket_medio = analyze_ticket_medio(data['orders'], data['order_details'])
+        else:
+            ticket_medio = cache.call(analyze_ticket_medio, data, ['orders', 'order_details'],
+                                      data['orders'], data['order_details'])
+    with stage('analyze_churn'):
+        if cache is None:
+            churn_rate = analyze_churn(data['orders'])
+        else:
+            churn_rate = cache.call(analyze_churn, data, ['orders'], data['orders'],
+                                    window_days=DEFAULT_WINDOW_DAYS)
+    return results, ticket_medio, churn_rate
+
+
+def _run_sql(data, backend, cache):
+    # Importado só quando o backend SQL é escolhido: duckdb fica fora da execução padrão
+    from src.analysis.sql_analyses import SQL_ANALYSES, run_sql_analyses, sql_churn, sql_ticket_medio
+    from src.etl.sql_engine import connect as connect_sql
+
+    with stage('sql_connect'):
+        engine = connect_sql(data, engine=None if backend == 'sql' else backend)
+    try:
+        if cache is None:
+            with stage('run_analyses'):
+                results = run_sql_analyses(engine, [analysis.__name__ for analysis in ANALYSES])
+            ticket_medio = sql_ticket_medio(engine)
+            churn_rate = sql_churn(engine)
+        else:
+            with stage('run_analyses'):
+                results = {analysis.__name__: cache.call(SQL_ANALYSES[analysis.__name__], data,
+                                                         ANALYSIS_INPUTS[analysis.__name__], engine)
+                           for analysis in ANALYSES}
+            ticket_medio = cache.call(sql_ticket_medio, data, ['order_details'], engine)
+            churn_rate = cache.call(sql_churn, data, ['orders'], engine, window_days=DEFAULT_WINDOW_DAYS)
+    finally:
+        engine.close()
+    return results, ticket_medio, churn_rate
+
+
+def main(workers=None, mode='process', trace=None, report=None, console=True, result_cache=None,
+         backend=None, filters=None):
+    # trace=True imprime o resumo; trace='caminho.json' também grava o trace
+    # report='caminho.json' ou 'caminho.html' grava os resultados; console=False não imprime nada
+    # result_cache=True reaproveita resultados gravados enquanto as tabelas de entrada não mudarem
+    # backend='duckdb' ou 'sqlite' executa as análises como consultas SQL ('sql' escolhe o disponível)
+    # filters={'start': ..., 'end': ..., 'countries': [...]} lê só as partições de pedidos do recorte
+    # NORTHWIND_SHARED_STORE=1 mapeia as tabelas do armazenamento compartilhado em vez de copiá-las
+    trace = trace if trace is not None else os.environ.get('NORTHWIND_TRACE')
+    tracer = enable_tracing() if trace else None
+
+    if result_cache is None:
+        result_cache = os.environ.get('NORTHWIND_RESULT_CACHE', '') not in ('', '0')
+    backend = backend or os.environ.get('NORTHWIND_BACKEND') or 'pandas'
+    if backend not in BACKENDS:
+        raise ValueError(f"Backend desconhecido: {backend}")
+
+    with stage('load_all_data') as frame:
+        data = get_loader()(columns=ANALYSIS_COLUMNS, filters=filters)
+        # Carrega tabelas e tabela fato antes de distribuir as análises entre os workers
+        for table in ANALYSIS_COLUMNS:
+            data[table]
+        frame['rows'] = sum(len(data[table]) for table in ANALYSIS_COLUMNS)
+    with stage('check_data_quality'):
+        quality = check_data_quality(data, tables=ANALYSIS_COLUMNS)
+    issues = quality.issues()
+    if console and not quality.passed:
+        print("Atenção: problemas de qualidade nos dados")
+        for issue in issues:
+            print(f"  • {issue}")
+    cache = ResultCache(get_result_cache_dir(data.data_dir)) if result_cache else None
+    if backend == 'pandas':
+        results, ticket_medio, churn_rate = _run_pandas(data, workers, mode, cache)
+    else:
+        results, ticket_medio, churn_rate = _run_sql(data, backend, cache)
+    results['kpis'] = AnalysisResult('kpis', "KPIs", metrics={
+        'ticket_medio': ticket_medio,
+        'churn_rate': churn_rate,
+    })
+    # Os problemas de qualidade vão para o relatório: com console=False não há outro lugar onde vê-los
+    results['data_quality'] = AnalysisResult('data_quality', "Qualidade dos dados", metrics={
+        'passed': quality.passed,
+        'issues': len(issues),
+    }, tables={'issues': pd.DataFrame({'issue': issues}, dtype=object)})
+
+    if console:
+        with stage('render_console'):
+            render_console(results[analysis.__name__] for analysis in ANALYSES)
+        print(f'Ticket Médio: R${ticket_medio:.2f}')
+        print(f'Taxa de Churn: {churn_rate:.2f}%')
+    if report:
+        with stage('render_report'):
+            render_report(list(results.values()), report)
+
+    if tracer is not None:
+        disable_tracing()
+        tracer.print_summary()
+        if isinstance(trace, str) and trace.lower().endswith('.json'):
+            tracer.to_json(trace)
+    return results
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
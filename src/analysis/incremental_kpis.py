@@ -0,0 +1,174 @@
+import hashlib
+import io
+import json
+import os
+import shutil
+import tempfile
+
+import pandas as pd
+
+from src.analysis.churn import DEFAULT_WINDOW_DAYS
+from src.analysis.kpis import KPI_COLUMNS
+from src.etl.cache import get_cache_dir, replace_directory
+from src.etl.data_loader import get_data_dir, get_table_path
+from src.etl.schema import apply_schema, read_csv_options
+
+STATE_DIRNAME = 'kpi_state'
+STATE_VERSION = 2
+PREFIX_HASH_BYTES = 64 * 1024
+
+
+def read_appended_rows(name, data_dir, offset, header):
+    path = get_table_path(name, data_dir)
+    columns = KPI_COLUMNS[name]
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        f.seek(offset)
+        if offset == 0:
+            header = f.readline().decode('utf-8').rstrip('\r\n').split(';')
+        start = f.tell()
+        chunk = f.read(size - start)
+
+    # Ignora uma última linha ainda incompleta; ela entra na próxima leitura
+    chunk = chunk[:chunk.rfind(b'\n') + 1]
+    end = start + len(chunk)
+    if not chunk.strip():
+        return pd.DataFrame(columns=columns), end, header
+
+    df = pd.read_csv(io.BytesIO(chunk), delimiter=';', header=None, names=header, usecols=columns,
+                     **read_csv_options(name, columns))
+    return apply_schema(name, df), end, header
+
+
+def file_prefix_hash(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read(PREFIX_HASH_BYTES)).hexdigest()
+
+
+class IncrementalKPIs:
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.order_totals = pd.Series(dtype='float64', name='total')
+        self.last_order_date = pd.Series(dtype='datetime64[ns]', name='last_order_date')
+        self.order_count = pd.Series(dtype='int64', name='order_count')
+        # Data de referência do churn: último pedido de todos, inclusive os sem cliente
+        self.latest_order_date = None
+        self.offsets = {name: 0 for name in KPI_COLUMNS}
+        self.headers = {name: None for name in KPI_COLUMNS}
+        self.prefixes = {name: None for name in KPI_COLUMNS}
+
+    def update(self, new_orders, new_order_details):
+        if len(new_order_details):
+            line_total = (new_order_details['unit_price'] * new_order_details['quantity']
+                          * (1 - new_order_details['discount']))
+            delta = line_total.groupby(new_order_details['order_id'].to_numpy()).sum()
+            known = delta.index.intersection(self.order_totals.index)
+            if len(known):
+                self.order_totals.loc[known] += delta.loc[known]
+            added = delta.drop(known)
+            totals = pd.concat([self.order_totals, added]) if len(self.order_totals) else added
+            if not totals.index.is_monotonic_increasing:
+                totals = totals.sort_index()
+            self.order_totals = totals.rename('total')
+
+        if len(new_orders):
+            latest = new_orders['order_date'].max()
+            if pd.notna(latest) and (self.latest_order_date is None or latest > self.latest_order_date):
+                self.latest_order_date = pd.Timestamp(latest)
+
+        # Como em CustomerActivity.from_orders: pedidos sem cliente ou sem data não contam por cliente
+        new_orders = new_orders[new_orders['customer_id'].notna() & new_orders['order_date'].notna()]
+        if len(new_orders):
+            customer_ids = new_orders['customer_id'].astype(str).to_numpy()
+            grouped = new_orders['order_date'].groupby(customer_ids)
+            last = grouped.max()
+            count = grouped.size()
+            if len(self.last_order_date):
+                last = pd.concat([self.last_order_date, last]).groupby(level=0).max()
+                count = pd.concat([self.order_count, count]).groupby(level=0).sum()
+            self.last_order_date = last.rename('last_order_date')
+            self.order_count = count.rename('order_count')
+        return self
+
+    def refresh(self, data_dir=None):
+        data_dir = data_dir or get_data_dir()
+        for name in KPI_COLUMNS:
+            path = get_table_path(name, data_dir)
+            if self.offsets[name] and (os.path.getsize(path) < self.offsets[name]
+                                       or file_prefix_hash(path) != self.prefixes[name]):
+                # Arquivo reescrito ou truncado: só é possível recalcular do zero
+                self.reset()
+                break
+
+        appended = {}
+        for name in KPI_COLUMNS:
+            df, offset, header = read_appended_rows(name, data_dir, self.offsets[name], self.headers[name])
+            appended[name] = df
+            self.offsets[name] = offset
+            self.headers[name] = header
+            self.prefixes[name] = file_prefix_hash(get_table_path(name, data_dir))
+        return self.update(appended['orders'], appended['order_details'])
+
+    def ticket_medio(self):
+        return self.order_totals.mean()
+
+    def churn_rate(self, window_days=DEFAULT_WINDOW_DAYS):
+        # Nenhum pedido datado de cliente ainda: como no cálculo completo, a taxa é indefinida
+        if self.latest_order_date is None or not len(self.last_order_date):
+            return float('nan')
+        churned = (self.latest_order_date - self.last_order_date).dt.days > window_days
+        return (churned.sum() / len(churned)) * 100
+
+    def save(self, state_dir):
+        # Totais, clientes e offsets vão juntos num diretório trocado de uma vez: um crash no meio
+        # nunca deixa totais novos com offsets antigos (o que contaria linhas em dobro)
+        parent = os.path.dirname(state_dir)
+        os.makedirs(parent, exist_ok=True)
+        tmp_dir = tempfile.mkdtemp(prefix=f'{os.path.basename(state_dir)}.', suffix='.tmp', dir=parent)
+        try:
+            self.order_totals.to_frame().to_parquet(os.path.join(tmp_dir, 'order_totals.parquet'))
+            customers = pd.concat([self.last_order_date, self.order_count], axis=1)
+            customers.to_parquet(os.path.join(tmp_dir, 'customers.parquet'))
+            latest = None if self.latest_order_date is None else self.latest_order_date.isoformat()
+            meta = {'version': STATE_VERSION, 'offsets': self.offsets, 'headers': self.headers,
+                    'prefixes': self.prefixes, 'latest_order_date': latest}
+            with open(os.path.join(tmp_dir, 'state.json'), 'w', encoding='utf-8') as f:
+                json.dump(meta, f, indent=2)
+        except BaseException:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+        replace_directory(tmp_dir, state_dir)
+
+    @classmethod
+    def load(cls, state_dir):
+        kpis = cls()
+        meta_path = os.path.join(state_dir, 'state.json')
+        if not os.path.exists(meta_path):
+            return kpis
+        with open(meta_path, encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get('version') != STATE_VERSION:
+            return kpis
+        kpis.order_totals = pd.read_parquet(os.path.join(state_dir, 'order_totals.parquet'))['total']
+        customers = pd.read_parquet(os.path.join(state_dir, 'customers.parquet'))
+        kpis.last_order_date = customers['last_order_date']
+        kpis.order_count = customers['order_count']
+        kpis.offsets = meta['offsets']
+        kpis.headers = meta['headers']
+        kpis.prefixes = meta['prefixes']
+        latest = meta['latest_order_date']
+        kpis.latest_order_date = None if latest is None else pd.Timestamp(latest)
+        return kpis
+
+
+def get_state_dir(data_dir=None):
+    return os.path.join(get_cache_dir(data_dir or get_data_dir()), STATE_DIRNAME)
+
+
+def update_kpis(data_dir=None, window_days=DEFAULT_WINDOW_DAYS):
+    state_dir = get_state_dir(data_dir)
+    kpis = IncrementalKPIs.load(state_dir).refresh(data_dir)
+    kpis.save(state_dir)
+    return kpis.ticket_medio(), kpis.churn_rate(window_days)
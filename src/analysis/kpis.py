@@ -0,0 +1,18 @@
+from src.analysis.churn import DEFAULT_WINDOW_DAYS, get_customer_activity
+
+# Colunas mínimas para os dois KPIs: o cron carrega só isso
+KPI_COLUMNS = {
+    'orders': ['order_id', 'customer_id', 'order_date'],
+    'order_details': ['order_id', 'unit_price', 'quantity', 'discount'],
+}
+
+
+def analyze_ticket_medio(orders, order_details):
+    total = order_details['unit_price'] * order_details['quantity'] * (1 - order_details['discount'])
+    order_values = total.groupby(order_details['order_id']).sum()
+    return order_values.mean()
+
+
+def analyze_churn(orders, window_days=DEFAULT_WINDOW_DAYS, as_of=None):
+    activity = get_customer_activity(orders)
+    return activity.churn_rates([window_days], None if as_of is None else [as_of]).iloc[0, 0]
@@ -0,0 +1,228 @@
+import html
+import json
+import os
+
+STATUS_NAMES = {'active': 'ATIVOS', 'inactive': 'INATIVOS'}
+
+
+def _banner(title, indent=15, blank_line=False):
+    print("\n" + "=" * 50)
+    print(" " * indent + title)
+    print("=" * 50 + ("\n" if blank_line else ""))
+
+
+def _console_sales_performance(result):
+    _banner(result.title, blank_line=True)
+    print("Top 10 Produtos por Receita:")
+    print(result['sales_by_product'].head(10))
+    print("\nVendas por Categoria:")
+    print(result['category_sales'])
+
+
+def _console_active_vs_inactive_products(result):
+    for prefix, status_name in STATUS_NAMES.items():
+        _banner(f"ANÁLISE DE PRODUTOS {status_name}", indent=1)
+
+        print("\n1. Métricas Gerais:")
+        print(f"Total de produtos: {result[f'{prefix}_products']}")
+        print(f"Total de vendas: R$ {result[f'{prefix}_total_sale']:,.2f}")
+        print(f"Ticket médio: R$ {result[f'{prefix}_ticket']:,.2f}")
+        print(f"Quantidade total vendida: {result[f'{prefix}_quantity']:,}")
+
+        print("\n2. Top 5 Produtos por Receita:")
+        print(result[f'{prefix}_top_products'])
+
+        print("\n3. Vendas por Categoria:")
+        print(result[f'{prefix}_categories'])
+
+        print("\n4. Tendência de Vendas por Ano-Mês:")
+        print(result[f'{prefix}_monthly'].tail())
+
+        print("\n5. Impacto dos Descontos:")
+        print(result[f'{prefix}_discounts'])
+
+    _banner(result.title, indent=1)
+    comparative = result['comparative'].copy()
+    for column in ('Ativos', 'Inativos'):
+        comparative[column] = comparative[column].map('{:,.2f}'.format)
+
+    print("\nComparativo Final:")
+    print(comparative.to_string(index=False))
+
+
+def _console_product_status(result):
+    sales_by_status = result['sales_by_status']
+
+    _banner(result.title, blank_line=True)
+    print("Vendas por Status do Produto:")
+    for status, label in ((0, "Ativos"), (1, "Inativos")):
+        print(f"\nProdutos {label} ({status}):")
+        if status in sales_by_status.index:
+            print(f"Total vendas: R$ {sales_by_status.loc[status, 'total_sale']:,.2f}")
+            print(f"Quantidade vendida: {sales_by_status.loc[status, 'quantity']:,}")
+
+
+def _console_seasonality(result):
+    _banner(result.title, blank_line=True)
+    print("Vendas por Mês:")
+    print(result['sales_by_month'].sort_values('total_sale', ascending=False))
+
+
+def _console_geographic_distribution(result):
+    _banner(result.title, indent=10, blank_line=True)
+    print("Vendas por País:")
+    print(result['sales_by_country'])
+
+
+def _console_cross_selling(result):
+    pairs = result['product_pairs'][['product_a', 'product_b', 'frequency']]
+    pairs.columns = ['Produto 1', 'Produto 2', 'Frequência']
+
+    print("\nImpacto dos Descontos:")
+    print(result['discount_analysis'])
+
+    print("\nTop 10 Pares de Produtos:")
+    print(pairs.head(10).to_string(index=False))
+
+
+def _console_customer_behavior(result):
+    _banner(result.title)
+
+    print("\nPerfil de Compras dos Clientes:")
+    print(f"\nTotal de clientes ativos: {result['active_customers']:.0f}")
+    print(f"Número médio de pedidos por cliente: {result['mean_orders']:.1f}")
+    print("\nSegmentação por frequência de compra:")
+    print(f"- Clientes de baixa frequência (1-4 pedidos): {result['low_frequency_customers']} clientes")
+    print(f"- Clientes de média frequência (5-12 pedidos): {result['medium_frequency_customers']} clientes")
+    print(f"- Clientes de alta frequência (>12 pedidos): {result['high_frequency_customers']} clientes")
+    print(f"\nCliente mais frequente: {result['max_orders']:.0f} pedidos")
+
+    print("\nTop 10 Clientes por Valor Total de Compras:")
+    top_customers = result['customer_value'].sort_values('total_sale', ascending=False).head(10)
+    print(top_customers.to_string(float_format=lambda x: f"R$ {x:,.2f}"))
+
+
+def _console_customer_patterns(result):
+    _banner(result.title)
+
+    print("\nPadrões por Segmento:")
+    print(result['segment_stats'])
+
+    print(f"\nAnálise de Clientes Inativos (>{result['window_days']} dias):")
+    print(f"Total de clientes inativos: {result['churned_customers']}")
+    print(f"Valor médio por pedido dos inativos: R$ {result['churned_mean_order_value']:.2f}")
+    print(f"Valor total perdido: R$ {result['churned_total_value']:.2f}")
+
+
+def _console_temporal_patterns(result):
+    _banner(result.title)
+
+    print("\nMétricas Mensais:")
+    print(result['monthly_metrics'])
+
+    print("\nTop 3 Meses por Receita:")
+    print(result['top_months'])
+
+    print("\nCrescimento Mês a Mês (%):")
+    print(result['monthly_growth'].rename(('total_sale', 'sum')).tail().round(2))
+
+
+def _console_category_seasonality(result):
+    _banner(result.title, indent=10)
+
+    print("\nMeses Mais Fortes por Categoria:")
+    for (category, best_month), row in result['best_months'].iterrows():
+        print(f"\n{category}:")
+        print(f"Melhor mês: {best_month}")
+        print(f"Vendas: R$ {row['total_sale']:,.2f}")
+        print(f"Desconto médio: {row['discount'] * 100:.1f}%")
+
+    print("\nImpacto dos Descontos por Categoria:")
+    print(result['discount_impact'])
+
+
+def _console_churn_risk(result):
+    _banner(result.title)
+
+    print("\nDistribuição de Risco:")
+    for row in result['risk_summary'].itertuples():
+        print(f"{row.Index}: {row.customers} clientes ({row.share_pct:.1f}%)")
+        print(f"- Média de pedidos: {row.mean_orders:.1f}")
+        print(f"- Valor médio por pedido: R${row.mean_order_value:.2f}")
+        print(f"- Valor total: R${row.total_value:.2f}\n")
+
+
+def _console_generic(result):
+    _banner(result.title)
+    for key, value in result.metrics.items():
+        print(f"{key}: {value}")
+    for key, table in result.tables.items():
+        print(f"\n{key}:")
+        print(table)
+
+
+CONSOLE_RENDERERS = {
+    'sales_performance': _console_sales_performance,
+    'active_vs_inactive_products': _console_active_vs_inactive_products,
+    'product_status': _console_product_status,
+    'seasonality': _console_seasonality,
+    'geographic_distribution': _console_geographic_distribution,
+    'cross_selling': _console_cross_selling,
+    'customer_behavior': _console_customer_behavior,
+    'customer_patterns': _console_customer_patterns,
+    'temporal_patterns': _console_temporal_patterns,
+    'category_seasonality': _console_category_seasonality,
+    'churn_risk': _console_churn_risk,
+}
+
+
+def render_console(results):
+    for result in results:
+        CONSOLE_RENDERERS.get(result.name, _console_generic)(result)
+
+
+def _write_text(path, text):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+
+
+def render_json(results, path=None):
+    text = json.dumps([result.to_dict() for result in results], ensure_ascii=False, indent=2, default=str)
+    if path is not None:
+        _write_text(path, text)
+    return text
+
+
+def render_html(results, path=None, title="Northwind Analysis"):
+    sections = []
+    for result in results:
+        parts = [f"<section id=\"{html.escape(result.name)}\">", f"<h2>{html.escape(result.title)}</h2>"]
+        if result.metrics:
+            parts.append("<dl>")
+            for key, value in result.metrics.items():
+                parts.append(f"<dt>{html.escape(key)}</dt><dd>{html.escape(str(value))}</dd>")
+            parts.append("</dl>")
+        for key, table in result.tables.items():
+            frame = table.to_frame() if hasattr(table, 'to_frame') else table
+            parts.append(f"<h3>{html.escape(key)}</h3>")
+            parts.append(frame.to_html(float_format=lambda x: f"{x:,.2f}", border=0))
+        parts.append("</section>")
+        sections.append("\n".join(parts))
+
+    text = (f"<!DOCTYPE html>\n<html lang=\"pt-BR\">\n<head>\n<meta charset=\"utf-8\">\n"
+            f"<title>{html.escape(title)}</title>\n</head>\n<body>\n<h1>{html.escape(title)}</h1>\n"
+            + "\n".join(sections) + "\n</body>\n</html>\n")
+    if path is not None:
+        _write_text(path, text)
+    return text
+
+
+def render_report(results, path):
+    if path.lower().endswith('.json'):
+        return render_json(results, path)
+    if path.lower().endswith(('.html', '.htm')):
+        return render_html(results, path)
+    raise ValueError(f"Formato de relatório não suportado: {path}")
@@ -0,0 +1,151 @@
+import hashlib
+import json
+import os
+import pickle
+
+from src.etl.cache import file_hash, file_signature, get_cache_dir
+from src.etl.data_loader import get_table_path
+from src.etl.schema import schema_key
+
+RESULTS_DIRNAME = 'results'
+RESULT_CACHE_VERSION = 2
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+SOURCE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_CODE_HASHES = {}
+
+
+def get_result_cache_dir(data_dir):
+    return os.path.join(get_cache_dir(data_dir), RESULTS_DIRNAME)
+
+
+def source_fingerprint():
+    # Hash de todo o pacote src: as análises dependem de churn, cube, sales_fact, schema etc.,
+    # não só do próprio módulo
+    if SOURCE_ROOT not in _CODE_HASHES:
+        digest = hashlib.sha256()
+        for root, dirs, files in os.walk(SOURCE_ROOT):
+            dirs[:] = sorted(name for name in dirs if name != '__pycache__')
+            for filename in sorted(files):
+                if filename.endswith('.py'):
+                    path = os.path.join(root, filename)
+                    digest.update(os.path.relpath(path, SOURCE_ROOT).encode('utf-8'))
+                    digest.update(file_hash(path).encode('utf-8'))
+        _CODE_HASHES[SOURCE_ROOT] = digest.hexdigest()
+    return _CODE_HASHES[SOURCE_ROOT]
+
+
+def code_fingerprint(fn):
+    # Qualquer alteração no código do pacote invalida os resultados gravados
+    return f'{fn.__module__}.{fn.__qualname__}@{source_fingerprint()}'
+
+
+def input_fingerprint(data, tables):
+    data_dir = getattr(data, 'data_dir', None)
+    if data_dir is None:
+        return None
+    columns = getattr(data, 'columns', None) or {}
+    fingerprint = {
+        name: dict(file_signature(get_table_path(name, data_dir)), columns=columns.get(name),
+                   schema=schema_key(name))
+        for name in sorted(tables)
+    }
+    filters = getattr(data, 'filters', None)
+    if filters:
+        fingerprint['filters'] = filters.key()
+    return fingerprint
+
+
+class ResultCache:
+    def __init__(self, cache_dir, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, name, params, fingerprint):
+        encoded = json.dumps({'version': RESULT_CACHE_VERSION, 'name': name, 'params': params,
+                              'inputs': fingerprint}, sort_keys=True, default=str)
+        return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.cache_dir, f'{key}.pkl')
+
+    def get(self, key):
+        path = self.path(key)
+        try:
+            with open(path, 'rb') as f:
+                result = pickle.load(f)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+            self._remove(path)
+            self.misses += 1
+            return None
+        # mtime marca o último uso: é a ordem do LRU
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        self.hits += 1
+        return result
+
+    def put(self, key, result):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self.path(key)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        self.evict()
+
+    def call(self, fn, data, tables, *args, **params):
+        fingerprint = input_fingerprint(data, tables)
+        if fingerprint is None:
+            return fn(*args, **params)
+        key = self.key(code_fingerprint(fn), params, fingerprint)
+        result = self.get(key)
+        if result is None:
+            result = fn(*args, **params)
+            self.put(key, result)
+        return result
+
+    def entries(self):
+        if not os.path.isdir(self.cache_dir):
+            return []
+        entries = []
+        for filename in os.listdir(self.cache_dir):
+            if not filename.endswith('.pkl'):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.cache_dir, filename))
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, filename))
+        return sorted(entries)
+
+    def size(self):
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self):
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, filename in entries:
+            if total <= self.max_bytes:
+                break
+            self._remove(os.path.join(self.cache_dir, filename))
+            total -= size
+            removed += 1
+        return removed
+
+    def clear(self):
+        for _, _, filename in self.entries():
+            self._remove(os.path.join(self.cache_dir, filename))
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
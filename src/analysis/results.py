@@ -0,0 +1,58 @@
+import pandas as pd
+
+
+class AnalysisResult:
+    def __init__(self, name, title, tables=None, metrics=None):
+        self.name = name
+        self.title = title
+        # Tabelas e métricas sem formatação: a apresentação fica com os renderers
+        self.tables = dict(tables or {})
+        self.metrics = dict(metrics or {})
+
+    def __getitem__(self, key):
+        if key in self.tables:
+            return self.tables[key]
+        return self.metrics[key]
+
+    def __repr__(self):
+        return (f"AnalysisResult({self.name!r}, tables={list(self.tables)}, "
+                f"metrics={list(self.metrics)})")
+
+    @property
+    def rows(self):
+        return sum(len(table) for table in self.tables.values())
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'title': self.title,
+            'metrics': {key: _plain_value(value) for key, value in self.metrics.items()},
+            'tables': {key: _table_records(table) for key, table in self.tables.items()},
+        }
+
+
+def _plain_value(value):
+    if hasattr(value, 'item'):
+        value = value.item()
+    if isinstance(value, float) and value != value:
+        return None
+    if isinstance(value, (pd.Timestamp, pd.Period)):
+        return str(value)
+    return value
+
+
+def _column_name(column):
+    # Colunas MultiIndex vindas de reset_index têm partes vazias ('year_month', ''): só as preenchidas entram
+    if isinstance(column, tuple):
+        return '.'.join(str(part) for part in column if part is not None and str(part) != '')
+    return str(column)
+
+
+def _table_records(table):
+    frame = table.to_frame() if isinstance(table, pd.Series) else table
+    frame = frame.reset_index() if any(name is not None for name in frame.index.names) else frame
+    columns = [_column_name(column) for column in frame.columns]
+    return [
+        {column: _plain_value(value) for column, value in zip(columns, row)}
+        for row in frame.itertuples(index=False, name=None)
+    ]
@@ -0,0 +1,152 @@
+import contextlib
+import io
+import multiprocessing
+import os
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from src.analysis.result_cache import code_fingerprint, input_fingerprint
+from src.instrumentation import count_rows, get_tracer, stage
+
+# Preenchido antes do fork: os workers herdam as tabelas por copy-on-write, sem pickle
+_SHARED = {}
+
+
+class _ThreadLocalStdout(io.TextIOBase):
+    def __init__(self, fallback):
+        self._fallback = fallback
+        self._local = threading.local()
+
+    def capture(self, buffer):
+        self._local.buffer = buffer
+
+    def release(self):
+        self._local.buffer = None
+
+    def write(self, text):
+        buffer = getattr(self._local, 'buffer', None)
+        return (buffer or self._fallback).write(text)
+
+    def flush(self):
+        self._fallback.flush()
+
+
+def _run_traced(analysis, data):
+    with stage(analysis.__name__) as frame:
+        result = analysis(data)
+        frame['rows'] = count_rows(result)
+    return result
+
+
+def _run_captured(analysis, data):
+    buffer = io.StringIO()
+    with contextlib.redirect_stdout(buffer):
+        result = _run_traced(analysis, data)
+    return buffer.getvalue(), result
+
+
+def _process_worker(index):
+    tracer = get_tracer()
+    first_record = len(tracer.records) if tracer else 0
+    output, result = _run_captured(_SHARED['analyses'][index], _SHARED['data'])
+    # Os registros do worker ficam no processo filho: devolvidos junto com o resultado
+    records = tracer.records[first_record:] if tracer else []
+    return output, result, records
+
+
+def _thread_worker(stdout, analysis, data):
+    buffer = io.StringIO()
+    stdout.capture(buffer)
+    try:
+        result = _run_traced(analysis, data)
+    finally:
+        stdout.release()
+    return buffer.getvalue(), result, []
+
+
+def _resolve_mode(mode):
+    if mode == 'process' and 'fork' not in multiprocessing.get_all_start_methods():
+        return 'thread'
+    return mode
+
+
+def _collect(futures, analyses, echo):
+    results = {}
+    for analysis, future in zip(analyses, futures):
+        output, result, records = future.result()
+        if echo:
+            sys.stdout.write(output)
+        if records and get_tracer() is not None:
+            get_tracer().records.extend(records)
+        results[analysis.__name__] = result
+    return results
+
+
+def _run_cached(data, analyses, workers, mode, echo, cache, inputs, prepare):
+    # Só as análises cujas entradas (ou código) mudaram voltam a ser executadas
+    keys = {}
+    results = {}
+    for analysis in analyses:
+        fingerprint = input_fingerprint(data, inputs.get(analysis.__name__, data.keys()))
+        if fingerprint is None:
+            continue
+        keys[analysis.__name__] = cache.key(code_fingerprint(analysis), {}, fingerprint)
+        with stage(f'result_cache[{analysis.__name__}]'):
+            cached = cache.get(keys[analysis.__name__])
+        if cached is not None:
+            results[analysis.__name__] = cached
+
+    pending = [analysis for analysis in analyses if analysis.__name__ not in results]
+    if pending:
+        computed = run_analyses(data, pending, workers=workers, mode=mode, echo=echo, prepare=prepare)
+        for name, result in computed.items():
+            if name in keys:
+                cache.put(keys[name], result)
+        results.update(computed)
+    return {analysis.__name__: results[analysis.__name__] for analysis in analyses}
+
+
+def run_analyses(data, analyses, workers=None, mode='process', echo=True, cache=None, inputs=None,
+                 prepare=None):
+    analyses = list(analyses)
+    if cache is not None:
+        return _run_cached(data, analyses, workers, mode, echo, cache, inputs or {}, prepare)
+    if prepare is not None:
+        # Estruturas compartilhadas (ex.: tabela fato) são montadas antes de distribuir o trabalho
+        prepare(data)
+    workers = workers or min(len(analyses), os.cpu_count() or 1)
+    mode = _resolve_mode(mode)
+
+    if workers <= 1 or mode == 'serial':
+        results = {}
+        for analysis in analyses:
+            if echo:
+                results[analysis.__name__] = _run_traced(analysis, data)
+            else:
+                results[analysis.__name__] = _run_captured(analysis, data)[1]
+        return results
+
+    if mode == 'process':
+        _SHARED['data'] = data
+        _SHARED['analyses'] = analyses
+        try:
+            context = multiprocessing.get_context('fork')
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+                futures = [executor.submit(_process_worker, i) for i in range(len(analyses))]
+                return _collect(futures, analyses, echo)
+        finally:
+            _SHARED.clear()
+
+    if mode == 'thread':
+        original_stdout = sys.stdout
+        stdout = _ThreadLocalStdout(original_stdout)
+        sys.stdout = stdout
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(_thread_worker, stdout, analysis, data) for analysis in analyses]
+                return _collect(futures, analyses, echo)
+        finally:
+            sys.stdout = original_stdout
+
+    raise ValueError(f"Modo de execução desconhecido: {mode}")
@@ -0,0 +1,249 @@
+import argparse
+import json
+import sys
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+
+from src.analysis.churn import DEFAULT_WINDOW_DAYS, get_customer_activity
+from src.analysis.cube import get_monthly_cube
+from src.analysis.exploratory_analysis import (ANALYSES, ANALYSIS_COLUMNS, analyze_churn,
+                                               analyze_ticket_medio)
+from src.etl.cache import file_signature
+from src.etl.data_loader import get_data_dir, get_table_path
+from src.etl.sales_fact import get_order_values, get_sales_fact
+from src.etl.shared_store import get_loader
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8000
+DEFAULT_POLL_SECONDS = 5.0
+
+ENDPOINTS = {analysis.__name__[len('analyze_'):]: analysis for analysis in ANALYSES}
+
+# Parâmetros aceitos na query string de cada endpoint e como convertê-los
+PARAMETERS = {
+    'cross_selling': {'min_support': int},
+    'churn': {'window_days': int, 'as_of': pd.Timestamp},
+}
+
+
+def _parse_params(endpoint, query):
+    allowed = PARAMETERS.get(endpoint, {})
+    params = {}
+    for key, values in query.items():
+        if key in ('limit', 'tables'):
+            continue
+        if key not in allowed:
+            raise ValueError(f"Parâmetro desconhecido para {endpoint}: {key}")
+        params[key] = allowed[key](values[-1])
+    return params
+
+
+def _limit_tables(payload, query):
+    selected = query.get('tables', [None])[-1]
+    if selected:
+        names = selected.split(',')
+        payload['tables'] = {key: table for key, table in payload['tables'].items() if key in names}
+    if 'limit' in query:
+        limit = int(query['limit'][-1])
+        payload['tables'] = {key: rows[:limit] for key, rows in payload['tables'].items()}
+    return payload
+
+
+class Snapshot:
+    def __init__(self, data, signature):
+        self.data = data
+        self.signature = signature
+        self.loaded_at = datetime.now().isoformat(timespec='seconds')
+        self.results = {}
+        self.lock = threading.Lock()
+        self.key_locks = {}
+
+    def memoize(self, key, compute):
+        if key in self.results:
+            return self.results[key]
+        # Requisições iguais e simultâneas calculam o resultado uma única vez
+        with self.lock:
+            key_lock = self.key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            if key not in self.results:
+                self.results[key] = compute()
+        return self.results[key]
+
+
+def data_signature(data_dir, tables=ANALYSIS_COLUMNS):
+    return {name: file_signature(get_table_path(name, data_dir)) for name in tables}
+
+
+def load_snapshot(data_dir):
+    data = get_loader()(data_dir, columns=ANALYSIS_COLUMNS)
+    # Assinatura de quando cada tabela foi lida: é com ela que o cubo é gravado e que o poll compara
+    signature = data.source_signature(ANALYSIS_COLUMNS)
+    # Estruturas derivadas são montadas antes de atender: as requisições só as leem
+    get_sales_fact(data)
+    get_monthly_cube(data)
+    get_customer_activity(data['orders'], get_order_values(data))
+    return Snapshot(data, signature)
+
+
+class AnalysisService:
+    def __init__(self, data_dir=None, poll_seconds=DEFAULT_POLL_SECONDS):
+        self.data_dir = data_dir or get_data_dir()
+        self.poll_seconds = poll_seconds
+        self.snapshot = load_snapshot(self.data_dir)
+        self.reload_lock = threading.Lock()
+        self.last_error = None
+        self._stop = threading.Event()
+        self._watcher = None
+
+    def reload(self, force=False):
+        with self.reload_lock:
+            try:
+                signature = data_signature(self.data_dir)
+                if not force and signature == self.snapshot.signature:
+                    return False
+                snapshot = load_snapshot(self.data_dir)
+            except Exception as error:
+                # Arquivo em meio a uma gravação: continua servindo o snapshot anterior
+                self.last_error = f"{type(error).__name__}: {error}"
+                return False
+            self.snapshot = snapshot
+            self.last_error = None
+            return True
+
+    def _watch(self):
+        while not self._stop.wait(self.poll_seconds):
+            self.reload()
+
+    def start_watching(self):
+        if self.poll_seconds and self._watcher is None:
+            self._watcher = threading.Thread(target=self._watch, name='data-watcher', daemon=True)
+            self._watcher.start()
+
+    def stop_watching(self):
+        self._stop.set()
+
+    def status(self):
+        snapshot = self.snapshot
+        return {
+            'status': 'ok',
+            'data_dir': self.data_dir,
+            'loaded_at': snapshot.loaded_at,
+            'tables': snapshot.signature,
+            'cached_results': len(snapshot.results),
+            'last_error': self.last_error,
+        }
+
+    def ticket_medio(self):
+        snapshot = self.snapshot
+        value = snapshot.memoize(('ticket_medio',), lambda: analyze_ticket_medio(
+            snapshot.data['orders'], snapshot.data['order_details']))
+        return {'ticket_medio': float(value)}
+
+    def churn(self, window_days=DEFAULT_WINDOW_DAYS, as_of=None):
+        snapshot = self.snapshot
+        value = snapshot.memoize(('churn', window_days, as_of), lambda: analyze_churn(
+            snapshot.data['orders'], window_days=window_days, as_of=as_of))
+        return {'window_days': window_days, 'as_of': None if as_of is None else str(as_of),
+                'churn_rate': float(value)}
+
+    def analysis(self, endpoint, **params):
+        snapshot = self.snapshot
+        analysis = ENDPOINTS[endpoint]
+        key = (endpoint,) + tuple(sorted(params.items()))
+        return snapshot.memoize(key, lambda: analysis(snapshot.data, **params).to_dict())
+
+
+class ServiceHandler(BaseHTTPRequestHandler):
+    service = None
+
+    def _send(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False, default=str).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _route(self, path, query):
+        parts = [part for part in path.split('/') if part]
+        if parts == ['health']:
+            return self.service.status()
+        if parts == ['analyses']:
+            return {'analyses': sorted(ENDPOINTS), 'kpis': ['ticket-medio', 'churn']}
+        if parts == ['kpis', 'ticket-medio']:
+            return self.service.ticket_medio()
+        if parts == ['kpis', 'churn']:
+            return self.service.churn(**_parse_params('churn', query))
+        if len(parts) == 2 and parts[0] == 'analyses' and parts[1] in ENDPOINTS:
+            payload = self.service.analysis(parts[1], **_parse_params(parts[1], query))
+            return _limit_tables(dict(payload), query)
+        return None
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        started = time.perf_counter()
+        try:
+            payload = self._route(url.path, parse_qs(url.query))
+        except ValueError as error:
+            self._send(400, {'error': str(error)})
+            return
+        except Exception as error:
+            self._send(500, {'error': f"{type(error).__name__}: {error}"})
+            return
+        if payload is None:
+            self._send(404, {'error': f"Endpoint desconhecido: {url.path}"})
+            return
+        payload['elapsed_ms'] = round((time.perf_counter() - started) * 1000, 3)
+        self._send(200, payload)
+
+    def do_POST(self):
+        if urlparse(self.path).path != '/reload':
+            self._send(404, {'error': f"Endpoint desconhecido: {self.path}"})
+            return
+        reloaded = self.service.reload(force=True)
+        self._send(200 if reloaded else 500, dict(self.service.status(), reloaded=reloaded))
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+def create_server(service, host=DEFAULT_HOST, port=DEFAULT_PORT, verbose=False):
+    handler = type('BoundServiceHandler', (ServiceHandler,), {'service': service})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    server.verbose = verbose
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serviço HTTP/JSON com as análises da Northwind")
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--data-dir', default=None)
+    parser.add_argument('--poll', type=float, default=DEFAULT_POLL_SECONDS,
+                        help="intervalo em segundos para verificar mudanças nos dados (0 desativa)")
+    parser.add_argument('--verbose', action='store_true')
+    args = parser.parse_args(argv)
+
+    service = AnalysisService(args.data_dir, poll_seconds=args.poll)
+    service.start_watching()
+    server = create_server(service, args.host, args.port, args.verbose)
+    print(f"Servindo em http://{args.host}:{server.server_address[1]} (dados: {service.data_dir})",
+          file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.stop_watching()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,422 @@
+import pandas as pd
+
+from src.analysis.churn import DEFAULT_WINDOW_DAYS, RFM_COLUMNS, summarize_risk
+from src.analysis.results import AnalysisResult
+from src.instrumentation import stage
+
+PRODUCT_STATUSES = {0: 'active', 1: 'inactive'}
+
+CUSTOMER_ACTIVITY_SQL = """
+WITH latest AS (SELECT MAX(order_date) AS order_date FROM orders),
+order_totals AS (
+    SELECT order_id, SUM(total_sale) AS total_sale
+    FROM sales_fact
+    WHERE order_id IS NOT NULL
+    GROUP BY order_id
+),
+activity AS (
+    SELECT o.customer_id, COUNT(*) AS frequency,
+           MIN(o.order_date) AS first_order_date, MAX(o.order_date) AS last_order_date,
+           COALESCE(SUM(t.total_sale), 0) AS monetary
+    FROM orders o LEFT JOIN order_totals t ON t.order_id = o.order_id
+    WHERE o.customer_id IS NOT NULL
+    GROUP BY o.customer_id
+    HAVING MAX(o.order_date) IS NOT NULL
+)
+SELECT a.customer_id, a.first_order_date, a.last_order_date, a.frequency, a.monetary,
+       {lifetime} AS customer_lifetime_days,
+       {recency} AS recency_days
+FROM activity a CROSS JOIN latest l
+ORDER BY a.customer_id
+"""
+
+
+def _year_month(values):
+    return pd.PeriodIndex(values, freq='M', name='year_month')
+
+
+def _customer_activity(engine):
+    sql = CUSTOMER_ACTIVITY_SQL.format(
+        lifetime=engine.expression('days_between', 'a.first_order_date', 'a.last_order_date'),
+        recency=engine.expression('days_between', 'a.last_order_date', 'l.order_date'))
+    activity = engine.query(sql).set_index('customer_id')
+    # sqlite devolve as datas como texto
+    for col in ('first_order_date', 'last_order_date'):
+        activity[col] = pd.to_datetime(activity[col])
+    return activity
+
+
+def sql_sales_performance(engine):
+    sales_by_product = engine.query("""
+        SELECT category_name, product_name, SUM(total_sale) AS total_sale, CAST(SUM(quantity) AS BIGINT) AS quantity
+        FROM sales_fact
+        WHERE category_name IS NOT NULL AND product_name IS NOT NULL
+        GROUP BY category_name, product_name
+        ORDER BY total_sale DESC
+    """).set_index(['category_name', 'product_name'])
+    category_sales = engine.query("""
+        SELECT category_name, SUM(total_sale) AS total_sale, CAST(SUM(quantity) AS BIGINT) AS quantity
+        FROM sales_fact
+        WHERE category_name IS NOT NULL AND product_name IS NOT NULL
+        GROUP BY category_name
+        ORDER BY total_sale DESC
+    """).set_index('category_name')
+
+    return AnalysisResult('sales_performance', "ANÁLISE DE VENDAS", tables={
+        'sales_by_product': sales_by_product,
+        'category_sales': category_sales,
+    })
+
+
+def sql_active_vs_inactive_products(engine):
+    overview = engine.query("""
+        SELECT discontinued, COUNT(DISTINCT product_id) AS products, SUM(total_sale) AS total_sale,
+               AVG(total_sale) AS ticket, CAST(SUM(quantity) AS BIGINT) AS quantity
+        FROM sales_fact
+        WHERE discontinued IS NOT NULL
+        GROUP BY discontinued
+    """).set_index('discontinued')
+
+    tables = {}
+    metrics = {}
+    for status, prefix in PRODUCT_STATUSES.items():
+        row = overview.loc[status] if status in overview.index else pd.Series(
+            {'products': 0, 'total_sale': 0.0, 'ticket': float('nan'), 'quantity': 0})
+        metrics[f'{prefix}_products'] = int(row['products'])
+        metrics[f'{prefix}_total_sale'] = float(row['total_sale'])
+        metrics[f'{prefix}_ticket'] = float(row['ticket'])
+        metrics[f'{prefix}_quantity'] = int(row['quantity'])
+
+        tables[f'{prefix}_top_products'] = engine.query("""
+            SELECT product_name, SUM(total_sale) AS total_sale, CAST(SUM(quantity) AS BIGINT) AS quantity
+            FROM sales_fact
+            WHERE discontinued = ? AND product_name IS NOT NULL
+            GROUP BY product_name
+            ORDER BY total_sale DESC
+            LIMIT 5
+        """, [status]).set_index('product_name')
+
+        tables[f'{prefix}_categories'] = engine.query("""
+            SELECT category_name, SUM(total_sale) AS total_sale, CAST(SUM(quantity) AS BIGINT) AS quantity,
+                   COUNT(DISTINCT product_id) AS product_id
+            FROM sales_fact
+            WHERE discontinued = ? AND category_name IS NOT NULL
+            GROUP BY category_name
+            ORDER BY total_sale DESC
+        """, [status]).set_index('category_name').round(2)
+
+        monthly = engine.query("""
+            SELECT year_month, SUM(total_sale) AS total_sale, COUNT(DISTINCT order_id) AS order_id
+            FROM sales_fact
+            WHERE discontinued = ? AND year_month IS NOT NULL
+            GROUP BY year_month
+            ORDER BY year_month
+        """, [status])
+        tables[f'{prefix}_monthly'] = monthly.set_index(_year_month(monthly.pop('year_month')))
+
+        tables[f'{prefix}_discounts'] = engine.query("""
+            SELECT discount, SUM(total_sale) AS total_sale, CAST(SUM(quantity) AS BIGINT) AS quantity
+            FROM sales_fact
+            WHERE discontinued = ? AND discount IS NOT NULL
+            GROUP BY discount
+            ORDER BY total_sale DESC
+        """, [status]).set_index('discount')
+
+    tables['comparative'] = pd.DataFrame({
+        'Métrica': ['Total Produtos', 'Total Vendas', 'Ticket Médio', 'Qtd Total'],
+        'Ativos': [metrics[f'active_{key}'] for key in ('products', 'total_sale', 'ticket', 'quantity')],
+        'Inativos': [metrics[f'inactive_{key}'] for key in ('products', 'total_sale', 'ticket', 'quantity')],
+    })
+
+    return AnalysisResult('active_vs_inactive_products', "COMPARATIVO FINAL ATIVOS VS INATIVOS",
+                          tables=tables, metrics=metrics)
+
+
+def sql_product_status(engine):
+    sales_by_status = engine.query("""
+        SELECT discontinued, SUM(total_sale) AS total_sale, CAST(SUM(quantity) AS BIGINT) AS quantity
+        FROM sales_fact
+        WHERE discontinued IS NOT NULL
+        GROUP BY discontinued
+        ORDER BY discontinued
+    """).set_index('discontinued')
+
+    return AnalysisResult('product_status', "ANÁLISE POR STATUS DO PRODUTO",
+                          tables={'sales_by_status': sales_by_status})
+
+
+def sql_seasonality(engine):
+    sales_by_month = engine.query("""
+        SELECT year, month, SUM(total_sale) AS total_sale
+        FROM sales_fact
+        WHERE year IS NOT NULL
+        GROUP BY year, month
+        ORDER BY year, month
+    """)
+
+    return AnalysisResult('seasonality', "ANÁLISE DE SAZONALIDADE",
+                          tables={'sales_by_month': sales_by_month})
+
+
+def sql_geographic_distribution(engine):
+    sales_by_country = engine.query("""
+        SELECT ship_country, SUM(total_sale) AS total_sale, COUNT(order_id) AS total_orders
+        FROM sales_fact
+        WHERE ship_country IS NOT NULL
+        GROUP BY ship_country
+        ORDER BY total_sale DESC
+    """).set_index('ship_country')
+
+    return AnalysisResult('geographic_distribution', "ANÁLISE DE DISTRIBUIÇÃO GEOGRÁFICA",
+                          tables={'sales_by_country': sales_by_country})
+
+
+def sql_cross_selling(engine, min_support=1):
+    discount_analysis = engine.query("""
+        SELECT discount, CAST(SUM(quantity) AS BIGINT) AS quantity, SUM(total_sale) AS total_sale
+        FROM sales_fact
+        WHERE discount IS NOT NULL
+        GROUP BY discount
+        ORDER BY total_sale DESC
+    """).set_index('discount')
+
+    # Mesma poda do pandas antes da autojunção: item abaixo do suporte mínimo não forma par
+    # frequente, e cesta que fica com um item só não forma par nenhum
+    with stage('count_pairs'):
+        product_pairs = engine.query("""
+            WITH baskets AS (
+                SELECT DISTINCT order_id, product_id FROM order_details
+                WHERE order_id IS NOT NULL AND product_id IS NOT NULL
+            ),
+            items AS (SELECT product_id, COUNT(*) AS n FROM baskets GROUP BY product_id),
+            n_orders AS (SELECT COUNT(DISTINCT order_id) AS n FROM baskets),
+            candidates AS (
+                SELECT b.order_id, b.product_id
+                FROM baskets b JOIN items i ON i.product_id = b.product_id
+                WHERE i.n >= ?
+            ),
+            multi AS (
+                SELECT c.order_id, c.product_id
+                FROM candidates c
+                JOIN (SELECT order_id FROM candidates GROUP BY order_id HAVING COUNT(*) > 1) m
+                  ON m.order_id = c.order_id
+            ),
+            pairs AS (
+                SELECT a.product_id AS product_id_a, b.product_id AS product_id_b, COUNT(*) AS pair_count
+                FROM multi a JOIN multi b ON a.order_id = b.order_id AND a.product_id < b.product_id
+                GROUP BY a.product_id, b.product_id
+                HAVING COUNT(*) >= ?
+            )
+            SELECT pa.product_name AS product_a, pb.product_name AS product_b,
+                   pairs.pair_count AS frequency,
+                   pairs.pair_count * 1.0 / n_orders.n AS support,
+                   pairs.pair_count * 1.0 * n_orders.n / (ia.n * ib.n) AS lift
+            FROM pairs
+            CROSS JOIN n_orders
+            JOIN items ia ON ia.product_id = pairs.product_id_a
+            JOIN items ib ON ib.product_id = pairs.product_id_b
+            LEFT JOIN products pa ON pa.product_id = pairs.product_id_a
+            LEFT JOIN products pb ON pb.product_id = pairs.product_id_b
+            ORDER BY pairs.pair_count DESC, pairs.product_id_a, pairs.product_id_b
+        """, [min_support, min_support])
+
+    return AnalysisResult('cross_selling', "CROSS-SELLING", tables={
+        'discount_analysis': discount_analysis,
+        'product_pairs': product_pairs,
+    })
+
+
+def sql_customer_behavior(engine):
+    order_counts = engine.query("""
+        SELECT customer_id, COUNT(order_id) AS orders
+        FROM orders
+        WHERE customer_id IS NOT NULL
+        GROUP BY customer_id
+    """)['orders']
+    freq_stats = order_counts.describe().round(2)
+
+    customer_value = engine.query("""
+        SELECT f.customer_id, c.company_name, SUM(f.total_sale) AS total_sale
+        FROM sales_fact f
+        JOIN customers c ON c.customer_id = f.customer_id
+        GROUP BY f.customer_id, c.company_name
+        ORDER BY f.customer_id, c.company_name
+    """).set_index(['customer_id', 'company_name']).round(2)
+
+    return AnalysisResult('customer_behavior', "ANÁLISE DE CLIENTES", tables={
+        'customer_value': customer_value,
+    }, metrics={
+        'active_customers': freq_stats['count'],
+        'mean_orders': freq_stats['mean'],
+        'max_orders': freq_stats['max'],
+        'low_frequency_customers': int((order_counts <= 4).sum()),
+        'medium_frequency_customers': int(((order_counts > 4) & (order_counts <= 12)).sum()),
+        'high_frequency_customers': int((order_counts > 12).sum()),
+    })
+
+
+def sql_customer_patterns(engine, window_days=DEFAULT_WINDOW_DAYS):
+    activity = _customer_activity(engine)
+    customer_orders = pd.DataFrame({
+        'order_id': activity['frequency'],
+        'customer_lifetime_days': activity['customer_lifetime_days'],
+    })
+    customer_orders['segment'] = pd.cut(customer_orders['order_id'],
+                                        bins=[0, 4, 12, float('inf')],
+                                        labels=['Baixa', 'Média', 'Alta'])
+    segment_stats = customer_orders.groupby('segment', observed=False).agg({
+        'order_id': ['count', 'mean'],
+        'customer_lifetime_days': 'mean'
+    }).round(1)
+
+    churned = activity.index[activity['recency_days'] > window_days]
+    order_totals = engine.query("""
+        SELECT o.customer_id, t.total_sale
+        FROM orders o
+        JOIN (SELECT order_id, SUM(total_sale) AS total_sale
+              FROM sales_fact WHERE order_id IS NOT NULL GROUP BY order_id) t
+          ON t.order_id = o.order_id
+        WHERE o.customer_id IS NOT NULL
+    """)
+    churned_values = (order_totals[order_totals['customer_id'].isin(churned)]
+                      .groupby('customer_id', observed=True)
+                      .agg({'total_sale': ['count', 'mean', 'sum']}))
+
+    return AnalysisResult('customer_patterns', "PADRÕES DE CLIENTES", tables={
+        'segment_stats': segment_stats,
+        'churned_values': churned_values,
+    }, metrics={
+        'window_days': window_days,
+        'churned_customers': len(churned),
+        'churned_mean_order_value': churned_values['total_sale']['mean'].mean(),
+        'churned_total_value': churned_values['total_sale']['sum'].sum(),
+    })
+
+
+def sql_temporal_patterns(engine):
+    monthly = engine.query("""
+        SELECT year_month, SUM(total_sale) AS revenue, SUM(total_sale) / COUNT(*) AS mean_sale,
+               COUNT(DISTINCT order_id) AS orders, COUNT(DISTINCT customer_id) AS customers
+        FROM sales_fact
+        WHERE year_month IS NOT NULL
+        GROUP BY year_month
+        ORDER BY year_month
+    """)
+    monthly.index = _year_month(monthly.pop('year_month'))
+    monthly_metrics = pd.DataFrame({
+        ('total_sale', 'sum'): monthly['revenue'],
+        ('total_sale', 'mean'): monthly['mean_sale'],
+        ('order_id', 'nunique'): monthly['orders'],
+        ('customer_id', 'nunique'): monthly['customers']
+    }).round(2)
+
+    category_monthly = engine.query("""
+        SELECT year_month, category_name, SUM(total_sale) AS total_sale
+        FROM sales_fact
+        WHERE year_month IS NOT NULL AND category_name IS NOT NULL
+        GROUP BY year_month, category_name
+    """)
+    category_monthly['year_month'] = _year_month(category_monthly['year_month'])
+    category_monthly = (category_monthly
+                        .pivot(index='year_month', columns='category_name', values='total_sale')
+                        .sort_index()
+                        .fillna(0))
+
+    return AnalysisResult('temporal_patterns', "ANÁLISE TEMPORAL", tables={
+        'monthly_metrics': monthly_metrics,
+        'top_months': monthly_metrics.sort_values(('total_sale', 'sum'), ascending=False).head(3),
+        'monthly_growth': (monthly_metrics[('total_sale', 'sum')].pct_change() * 100).rename('growth_pct'),
+        'category_monthly': category_monthly,
+    })
+
+
+def sql_category_seasonality(engine):
+    category_season = engine.query("""
+        SELECT category_name, month, SUM(total_sale) AS total_sale, CAST(SUM(quantity) AS BIGINT) AS quantity,
+               SUM(discount) / COUNT(*) AS discount
+        FROM sales_fact
+        WHERE category_name IS NOT NULL AND month IS NOT NULL
+        GROUP BY category_name, month
+        ORDER BY category_name, month
+    """).set_index(['category_name', 'month']).round(2)
+    best_months = category_season.loc[
+        category_season.groupby(level='category_name', observed=True, sort=False)['total_sale'].idxmax()]
+
+    discount_impact = engine.query("""
+        SELECT category_name, SUM(discount) / COUNT(*) AS discount, SUM(total_sale) AS total_sale,
+               CAST(SUM(quantity) AS BIGINT) AS quantity
+        FROM sales_fact
+        WHERE category_name IS NOT NULL
+        GROUP BY category_name
+        ORDER BY total_sale DESC
+    """).set_index('category_name').round(2)
+
+    return AnalysisResult('category_seasonality', "ANÁLISE DE SAZONALIDADE E DESCONTOS", tables={
+        'category_season': category_season,
+        'best_months': best_months,
+        'discount_impact': discount_impact,
+    })
+
+
+def sql_churn_risk(engine):
+    activity = _customer_activity(engine)
+    customer_sales = engine.query("""
+        SELECT customer_id, AVG(total_sale) AS mean_sale, SUM(total_sale) AS total_sale,
+               AVG(discount) AS discount
+        FROM sales_fact
+        WHERE customer_id IS NOT NULL
+        GROUP BY customer_id
+        ORDER BY customer_id
+    """).set_index('customer_id')
+    customer_sales.columns = pd.MultiIndex.from_tuples(
+        [('total_sale', 'mean'), ('total_sale', 'sum'), ('discount', 'mean')])
+
+    risk_levels, risk_summary = summarize_risk(activity['recency_days'], activity['frequency'],
+                                               customer_sales)
+
+    return AnalysisResult('churn_risk', "ANÁLISE DE RISCO DE CHURN", tables={
+        'risk_summary': risk_summary,
+        # Mesmas colunas do RFM em pandas: relatórios e cache não mudam de forma com o backend
+        'customer_risk': activity[RFM_COLUMNS].assign(risk=risk_levels),
+    })
+
+
+def sql_ticket_medio(engine):
+    return engine.scalar("""
+        SELECT AVG(total) FROM (
+            SELECT order_id, SUM(unit_price * quantity * (1 - discount)) AS total
+            FROM order_details
+            WHERE order_id IS NOT NULL
+            GROUP BY order_id
+        ) t
+    """)
+
+
+def sql_churn(engine, window_days=DEFAULT_WINDOW_DAYS):
+    activity = _customer_activity(engine)
+    return (activity['recency_days'] > window_days).sum() / len(activity) * 100
+
+
+# Mesmos nomes das análises em pandas: os resultados são intercambiáveis
+SQL_ANALYSES = {
+    'analyze_sales_performance': sql_sales_performance,
+    'analyze_active_vs_inactive_products': sql_active_vs_inactive_products,
+    'analyze_product_status': sql_product_status,
+    'analyze_seasonality': sql_seasonality,
+    'analyze_geographic_distribution': sql_geographic_distribution,
+    'analyze_cross_selling': sql_cross_selling,
+    'analyze_customer_behavior': sql_customer_behavior,
+    'analyze_customer_patterns': sql_customer_patterns,
+    'analyze_temporal_patterns': sql_temporal_patterns,
+    'analyze_category_seasonality': sql_category_seasonality,
+    'analyze_churn_risk': sql_churn_risk,
+}
+
+
+def run_sql_analyses(engine, names):
+    results = {}
+    for name in names:
+        with stage(f'sql[{name}]') as frame:
+            results[name] = SQL_ANALYSES[name](engine)
+            frame['rows'] = results[name].rows
+    return results
@@ -0,0 +1,227 @@
+import argparse
+import sys
+
+# Só a biblioteca padrão no topo: pandas e afins são importados dentro de cada subcomando,
+# de modo que --help e a validação dos argumentos não pagam por eles. As constantes abaixo
+# repetem as dos módulos de análise; benchmarks/startup.py confere que não divergiram
+ANALYSIS_COMMANDS = (
+    'sales_performance',
+    'active_vs_inactive_products',
+    'seasonality',
+    'geographic_distribution',
+    'cross_selling',
+    'customer_behavior',
+    'customer_patterns',
+    'temporal_patterns',
+    'category_seasonality',
+    'churn_risk',
+)
+BACKENDS = ('pandas', 'sql', 'duckdb', 'sqlite')
+FORMATS = ('console', 'json', 'html')
+DEFAULT_WINDOW_DAYS = 90
+DEFAULT_CHUNK_SIZE = 250_000
+
+
+def _load_kpi_data(data_dir):
+    from src.analysis.kpis import KPI_COLUMNS
+    from src.etl.shared_store import get_loader
+
+    return get_loader()(data_dir, columns=KPI_COLUMNS, tables=tuple(KPI_COLUMNS))
+
+
+def _ticket_medio(data, incremental=None):
+    if incremental is not None:
+        return incremental[0]
+    from src.analysis.kpis import analyze_ticket_medio
+    return analyze_ticket_medio(data['orders'], data['order_details'])
+
+
+def _churn(args, data, incremental=None):
+    if incremental is not None and args.as_of is None:
+        return incremental[1]
+    from src.analysis.kpis import analyze_churn
+    return analyze_churn(data['orders'], window_days=args.window_days, as_of=args.as_of)
+
+
+def _filters(args):
+    # Só monta o filtro se algum recorte foi pedido: sem ele o carregamento não muda
+    if args.start is None and args.end is None and not args.country:
+        return None
+    return {'start': args.start, 'end': args.end, 'countries': args.country or None}
+
+
+def cmd_kpis(args):
+    incremental = None
+    # Uma única atualização do estado devolve os dois KPIs; churn com --as-of recalcula do zero
+    if args.incremental and (args.command != 'churn' or args.as_of is None):
+        from src.analysis.incremental_kpis import update_kpis
+        incremental = update_kpis(args.data_dir, args.window_days)
+    # Tabelas lidas sob demanda e uma vez só: os dois KPIs compartilham orders
+    data = _load_kpi_data(args.data_dir)
+    if args.command in ('kpis', 'ticket-medio'):
+        print(f'Ticket Médio: R${_ticket_medio(data, incremental):.2f}')
+    if args.command in ('kpis', 'churn'):
+        print(f'Taxa de Churn: {_churn(args, data, incremental):.2f}%')
+
+
+def cmd_run(args):
+    from src.analysis import exploratory_analysis as analysis_module
+    from src.etl.shared_store import get_loader
+
+    data = get_loader()(args.data_dir, columns=analysis_module.ANALYSIS_COLUMNS, filters=_filters(args))
+    names = [f'analyze_{name}' for name in args.analyses]
+    if args.backend == 'pandas':
+        results = [getattr(analysis_module, name)(data) for name in names]
+    else:
+        from src.analysis.sql_analyses import run_sql_analyses
+        from src.etl.sql_engine import connect
+
+        engine = connect(data, engine=None if args.backend == 'sql' else args.backend)
+        try:
+            results = list(run_sql_analyses(engine, names).values())
+        finally:
+            engine.close()
+
+    _render(results, args)
+
+
+def _render(results, args):
+    from src.analysis.renderers import render_console, render_html, render_json, render_report
+
+    if args.format == 'console':
+        render_console(results)
+    elif args.output:
+        render_report(results, args.output)
+    else:
+        print(render_json(results) if args.format == 'json' else render_html(results))
+
+
+def cmd_stream(args):
+    from src.analysis.results import AnalysisResult
+    from src.etl.streaming import AGGREGATE_KEYS, stream_sales_aggregates
+
+    aggregates = stream_sales_aggregates(args.data_dir, chunksize=args.chunksize)
+    tables = {name: aggregates[name] for name in AGGREGATE_KEYS if aggregates[name] is not None}
+    if args.top is not None:
+        tables = {name: table.head(args.top) for name, table in tables.items()}
+    result = AnalysisResult('sales_aggregates', "AGREGADOS DE VENDAS (STREAMING)", tables=tables,
+                            metrics={'total_lines': aggregates['total_lines']})
+    _render([result], args)
+
+
+def cmd_all(args):
+    from src.analysis.exploratory_analysis import main
+
+    main(workers=args.workers, mode=args.mode, trace=args.trace, report=args.report,
+         backend=args.backend, result_cache=args.result_cache or None, filters=_filters(args))
+
+
+def cmd_quality(args):
+    from src.analysis.exploratory_analysis import ANALYSIS_COLUMNS
+    from src.etl.data_quality import check_data_quality
+    from src.etl.shared_store import get_loader
+
+    data = get_loader()(args.data_dir, columns=ANALYSIS_COLUMNS)
+    report = check_data_quality(data, tables=ANALYSIS_COLUMNS, verbose=True)
+    return 0 if report.passed else 1
+
+
+def cmd_serve(args):
+    from src.analysis.service import main
+
+    argv = ['--host', args.host, '--port', str(args.port), '--poll', str(args.poll)]
+    if args.data_dir:
+        argv += ['--data-dir', args.data_dir]
+    main(argv)
+
+
+def cmd_store(args):
+    from src.etl.shared_store import materialize_store
+
+    for name, path in materialize_store(args.data_dir, tables=args.tables).items():
+        print(f"{name}: {path}")
+
+
+def cmd_list(args):
+    for name in ANALYSIS_COMMANDS:
+        print(name)
+
+
+def _add_filter_arguments(parser):
+    parser.add_argument('--start', default=None, help="primeira data dos pedidos (AAAA-MM-DD)")
+    parser.add_argument('--end', default=None, help="última data dos pedidos, inclusiva (AAAA-MM-DD)")
+    parser.add_argument('--country', action='append', default=None,
+                        help="país de entrega (pode repetir)")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='northwind', description="Análises e KPIs da Northwind")
+    parser.add_argument('--data-dir', default=None, help="diretório com os CSVs (padrão: data/)")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    for command, help_text in (('kpis', "ticket médio e taxa de churn"),
+                               ('ticket-medio', "apenas o ticket médio"),
+                               ('churn', "apenas a taxa de churn")):
+        kpi_parser = subparsers.add_parser(command, help=help_text)
+        kpi_parser.add_argument('--window-days', type=int, default=DEFAULT_WINDOW_DAYS)
+        kpi_parser.add_argument('--as-of', default=None, help="data de referência do churn (AAAA-MM-DD)")
+        kpi_parser.add_argument('--incremental', action='store_true',
+                                help="usa o estado incremental em data/.cache/kpi_state")
+        kpi_parser.set_defaults(handler=cmd_kpis)
+
+    run_parser = subparsers.add_parser('run', help="executa uma ou mais análises")
+    run_parser.add_argument('analyses', nargs='+', choices=ANALYSIS_COMMANDS, metavar='ANÁLISE')
+    run_parser.add_argument('--format', choices=FORMATS, default='console')
+    run_parser.add_argument('--output', default=None,
+                            help="arquivo .json ou .html de saída (com --format json ou html)")
+    run_parser.add_argument('--backend', choices=BACKENDS, default='pandas')
+    _add_filter_arguments(run_parser)
+    run_parser.set_defaults(handler=cmd_run)
+
+    stream_parser = subparsers.add_parser('stream', help="agregados de vendas lendo order_details em lotes")
+    stream_parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNK_SIZE,
+                               help="linhas de order_details por lote")
+    stream_parser.add_argument('--top', type=int, default=None, help="só as N maiores linhas de cada tabela")
+    stream_parser.add_argument('--format', choices=FORMATS, default='console')
+    stream_parser.add_argument('--output', default=None,
+                               help="arquivo .json ou .html de saída (com --format json ou html)")
+    stream_parser.set_defaults(handler=cmd_stream)
+
+    all_parser = subparsers.add_parser('all', help="executa o relatório completo")
+    all_parser.add_argument('--workers', type=int, default=None)
+    all_parser.add_argument('--mode', choices=('process', 'thread', 'serial'), default='process')
+    all_parser.add_argument('--backend', choices=BACKENDS, default=None)
+    all_parser.add_argument('--report', default=None, help="grava os resultados em .json ou .html")
+    all_parser.add_argument('--trace', default=None, help="'1' imprime o resumo; caminho .json grava")
+    all_parser.add_argument('--result-cache', action='store_true')
+    _add_filter_arguments(all_parser)
+    all_parser.set_defaults(handler=cmd_all)
+
+    quality_parser = subparsers.add_parser('quality', help="relatório de qualidade dos dados")
+    quality_parser.set_defaults(handler=cmd_quality)
+
+    serve_parser = subparsers.add_parser('serve', help="sobe o serviço HTTP/JSON")
+    serve_parser.add_argument('--host', default='127.0.0.1')
+    serve_parser.add_argument('--port', type=int, default=8000)
+    serve_parser.add_argument('--poll', type=float, default=5.0)
+    serve_parser.set_defaults(handler=cmd_serve)
+
+    store_parser = subparsers.add_parser('store', help="materializa as tabelas no armazenamento compartilhado")
+    store_parser.add_argument('tables', nargs='*', metavar='TABELA')
+    store_parser.set_defaults(handler=cmd_store)
+
+    list_parser = subparsers.add_parser('list', help="lista as análises disponíveis")
+    list_parser.set_defaults(handler=cmd_list)
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command in ('run', 'stream') and args.output and args.format == 'console':
+        parser.error("--output exige --format json ou html")
+    return args.handler(args) or 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
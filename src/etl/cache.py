@@ -0,0 +1,188 @@
+import contextlib
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+CACHE_DIRNAME = '.cache'
+MANIFEST_FILENAME = 'manifest.json'
+LOCK_FILENAME = 'manifest.lock'
+CACHE_VERSION = 2
+HASH_CHUNK_SIZE = 8 * 1024 * 1024
+
+
+def cache_available():
+    return pa is not None
+
+
+def file_signature(path):
+    stat = os.stat(path)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def get_cache_dir(data_dir):
+    return os.path.join(data_dir, CACHE_DIRNAME)
+
+
+def read_manifest(cache_dir):
+    path = os.path.join(cache_dir, MANIFEST_FILENAME)
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if manifest.get('version') != CACHE_VERSION:
+        return {}
+    return manifest.get('tables', {})
+
+
+def _temp_path(path):
+    # Nome temporário próprio de cada gravação, no mesmo diretório para o os.replace ser atômico
+    fd, tmp_path = tempfile.mkstemp(prefix=f'{os.path.basename(path)}.', suffix='.tmp',
+                                    dir=os.path.dirname(path))
+    os.close(fd)
+    return tmp_path
+
+
+def _replace_file(path, write):
+    tmp_path = _temp_path(path)
+    try:
+        write(tmp_path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    os.replace(tmp_path, path)
+
+
+@contextlib.contextmanager
+def manifest_lock(cache_dir):
+    # Trava entre processos (pool com fork, CLI e serviço ao mesmo tempo); sem fcntl segue sem trava
+    os.makedirs(cache_dir, exist_ok=True)
+    with open(os.path.join(cache_dir, LOCK_FILENAME), 'a') as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        yield
+
+
+def write_manifest(cache_dir, tables):
+    def write(tmp_path):
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': CACHE_VERSION, 'tables': tables}, f, indent=2, sort_keys=True)
+    _replace_file(os.path.join(cache_dir, MANIFEST_FILENAME), write)
+
+
+def update_manifest(cache_dir, name, entry):
+    # Relido sob a trava: entradas gravadas por outros processos desde a nossa leitura são mantidas.
+    # Quem chama já segura a trava
+    manifest = read_manifest(cache_dir)
+    manifest[name] = entry
+    write_manifest(cache_dir, manifest)
+
+
+def snapshot_path(cache_dir, name):
+    return os.path.join(cache_dir, f'{name}.parquet')
+
+
+def _is_fresh(entry, source_path, snapshot, schema_version):
+    if entry is None or not os.path.exists(snapshot):
+        return False, None
+    if entry.get('schema_version') != schema_version:
+        return False, None
+    signature = file_signature(source_path)
+    if entry['size'] == signature['size'] and entry['mtime_ns'] == signature['mtime_ns']:
+        return True, None
+    # Arquivo tocado mas com o mesmo conteúdo: basta atualizar a assinatura
+    if entry['size'] == signature['size'] and entry.get('sha256') == file_hash(source_path):
+        return True, signature
+    return False, None
+
+
+def write_snapshot(df, cache_dir, name):
+    os.makedirs(cache_dir, exist_ok=True)
+    schema = pa.Schema.from_pandas(df, preserve_index=False)
+    table = pa.Table.from_pandas(df, schema=schema, preserve_index=False)
+    _replace_file(snapshot_path(cache_dir, name), lambda tmp_path: pq.write_table(table, tmp_path))
+    return {field.name: str(field.type) for field in schema}
+
+
+def read_snapshot(cache_dir, name, columns=None):
+    return pd.read_parquet(snapshot_path(cache_dir, name), engine='pyarrow', columns=columns)
+
+
+def load_cached_table(name, source_path, reader, cache_dir, columns=None, schema_version=None):
+    if not cache_available():
+        return reader(columns)
+
+    manifest = read_manifest(cache_dir)
+    entry = manifest.get(name)
+    fresh, new_signature = _is_fresh(entry, source_path, snapshot_path(cache_dir, name), schema_version)
+    if fresh:
+        if new_signature is not None:
+            with manifest_lock(cache_dir):
+                update_manifest(cache_dir, name, {**entry, **new_signature})
+        return read_snapshot(cache_dir, name, columns)
+
+    signature = file_signature(source_path)
+    sha256 = file_hash(source_path)
+    df = reader(None)
+    # Snapshot e entrada trocados juntos: outro processo nunca vê um sem o outro
+    with manifest_lock(cache_dir):
+        schema = write_snapshot(df, cache_dir, name)
+        update_manifest(cache_dir, name, dict(signature, sha256=sha256, schema=schema,
+                                              schema_version=schema_version))
+    if columns is not None:
+        return df[list(columns)]
+    return df
+
+
+def replace_directory(tmp_dir, target_dir):
+    # O diretório atual vai para o lado antes da troca: leitores nunca veem arquivos de versões misturadas
+    old_dir = tempfile.mkdtemp(prefix=f'{os.path.basename(target_dir)}.', suffix='.old',
+                               dir=os.path.dirname(target_dir))
+    try:
+        os.rename(target_dir, old_dir)
+    except FileNotFoundError:
+        pass
+    try:
+        os.rename(tmp_dir, target_dir)
+    except OSError:
+        # Outro processo instalou a sua versão no intervalo: vale a dele, a nossa é descartada
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    shutil.rmtree(old_dir, ignore_errors=True)
+
+
+def clear_cache(data_dir):
+    cache_dir = get_cache_dir(data_dir)
+    if not os.path.isdir(cache_dir):
+        return
+    for filename in os.listdir(cache_dir):
+        path = os.path.join(cache_dir, filename)
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        else:
+            os.remove(path)
@@ -1,23 +1,129 @@
 import pandas as pd
 import os
+from collections.abc import Mapping
 
+from src.etl.cache import file_signature, get_cache_dir, load_cached_table
+from src.etl.partitions import (FILTER_COLUMNS, PARTITIONED_TABLES, TableFilter, load_partitioned_table,
+                                partitions_available)
+from src.etl.schema import apply_schema, read_csv_options, schema_key
+from src.instrumentation import stage
 
-def load_all_data():
+TABLES = (
+    'orders',
+    'order_details',
+    'products',
+    'customers',
+    'employees',
+    'categories',
+    'suppliers',
+    'shippers',
+    'territories',
+    'region',
+    'us_states',
+    'employee_territories',
+)
+
+
+def get_data_dir():
     current_dir = os.path.dirname(os.path.abspath(__file__))
     project_root = os.path.dirname(os.path.dirname(current_dir))
-    data_dir = os.path.join(project_root, 'data')
-
-    return {
-        'orders': pd.read_csv(os.path.join(data_dir, 'orders.csv'), delimiter=';'),
-        'order_details': pd.read_csv(os.path.join(data_dir, 'order_details.csv'), delimiter=';'),
-        'products': pd.read_csv(os.path.join(data_dir, 'products.csv'), delimiter=';'),
-        'customers': pd.read_csv(os.path.join(data_dir, 'customers.csv'), delimiter=';'),
-        'employees': pd.read_csv(os.path.join(data_dir, 'employees.csv'), delimiter=';'),
-        'categories': pd.read_csv(os.path.join(data_dir, 'categories.csv'), delimiter=';'),
-        'suppliers': pd.read_csv(os.path.join(data_dir, 'suppliers.csv'), delimiter=';'),
-        'shippers': pd.read_csv(os.path.join(data_dir, 'shippers.csv'), delimiter=';'),
-        'territories': pd.read_csv(os.path.join(data_dir, 'territories.csv'), delimiter=';'),
-        'region': pd.read_csv(os.path.join(data_dir, 'region.csv'), delimiter=';'),
-        'us_states': pd.read_csv(os.path.join(data_dir, 'us_states.csv'), delimiter=';'),
-        'employee_territories': pd.read_csv(os.path.join(data_dir, 'employee_territories.csv'), delimiter=';')
-    }
\ No newline at end of file
+    return os.path.join(project_root, 'data')
+
+
+def get_table_path(name, data_dir=None):
+    return os.path.join(data_dir or get_data_dir(), f'{name}.csv')
+
+
+def read_csv_table(name, data_dir=None, columns=None):
+    usecols = list(columns) if columns is not None else None
+    df = pd.read_csv(get_table_path(name, data_dir), delimiter=';', usecols=usecols,
+                     **read_csv_options(name, usecols))
+    return apply_schema(name, df)
+
+
+def load_filtered_table(name, data_dir, use_cache, columns, filters):
+    if use_cache and partitions_available():
+        source_paths = {table: get_table_path(table, data_dir) for table in PARTITIONED_TABLES}
+        return load_partitioned_table(name, data_dir, source_paths,
+                                      lambda table: load_table(table, data_dir, use_cache),
+                                      columns, filters)
+
+    # Sem pyarrow (ou sem cache): lê o CSV e filtra em memória
+    orders = read_csv_table('orders', data_dir, ['order_id', *FILTER_COLUMNS])
+    keep = filters.mask(orders)
+    usecols = None if columns is None else list(dict.fromkeys([*columns, 'order_id']))
+    df = read_csv_table(name, data_dir, usecols)
+    if name == 'orders':
+        df = df[keep]
+    else:
+        df = df[df['order_id'].isin(orders['order_id'][keep])]
+    if columns is not None:
+        df = df[list(columns)]
+    return df.reset_index(drop=True)
+
+
+def load_table(name, data_dir=None, use_cache=True, columns=None, filters=None):
+    data_dir = data_dir or get_data_dir()
+    if filters and name in PARTITIONED_TABLES:
+        return load_filtered_table(name, data_dir, use_cache, columns, filters)
+    if not use_cache:
+        return read_csv_table(name, data_dir, columns)
+    return load_cached_table(name, get_table_path(name, data_dir),
+                             lambda cols: read_csv_table(name, data_dir, cols),
+                             get_cache_dir(data_dir), columns, schema_key(name))
+
+
+class LazyTables(Mapping):
+    def __init__(self, data_dir=None, use_cache=True, columns=None, tables=TABLES, filters=None):
+        unknown = set(columns or {}) - set(tables)
+        if unknown:
+            raise ValueError(f"Tabelas desconhecidas na projeção: {sorted(unknown)}")
+        self.data_dir = data_dir or get_data_dir()
+        self.use_cache = use_cache
+        self.columns = dict(columns or {})
+        # Filtros de data/país valem para orders e order_details; as demais tabelas vêm inteiras
+        self.filters = TableFilter.coerce(filters) or None
+        self._names = tuple(tables)
+        self._loaded = {}
+        self._signatures = {}
+
+    def __getitem__(self, name):
+        if name not in self._names:
+            raise KeyError(name)
+        if name not in self._loaded:
+            # Lida antes da carga: se o CSV mudar no meio, a assinatura guardada é a antiga e quem
+            # grava caches derivados destes dados nunca os associa à versão nova
+            self._signatures[name] = file_signature(get_table_path(name, self.data_dir))
+            with stage(f'load_table[{name}]') as frame:
+                self._loaded[name] = self._load(name)
+                frame['rows'] = len(self._loaded[name])
+        return self._loaded[name]
+
+    def _load(self, name):
+        return load_table(name, self.data_dir, self.use_cache, self.columns.get(name), self.filters)
+
+    def __iter__(self):
+        return iter(self._names)
+
+    def __len__(self):
+        return len(self._names)
+
+    def source_signature(self, names):
+        # Assinatura dos CSVs de quando cada tabela foi carregada, não a dos arquivos de agora
+        for name in names:
+            self[name]
+        return {name: self._signatures[name] for name in names}
+
+    def is_loaded(self, name):
+        return name in self._loaded
+
+    def loaded_tables(self):
+        return [name for name in self._names if name in self._loaded]
+
+    def __repr__(self):
+        filters = f", filters={self.filters!r}" if self.filters else ''
+        return f"{type(self).__name__}(loaded={self.loaded_tables()}, available={list(self._names)}{filters})"
+
+
+def load_all_data(data_dir=None, use_cache=True, columns=None, tables=TABLES, filters=None):
+    return LazyTables(data_dir, use_cache, columns, tables, filters)
@@ -1,23 +1,154 @@
 import pandas as pd
 
+from src.etl.schema import COERCED_ATTR, FOREIGN_KEYS, PRIMARY_KEYS, get_schema
+from src.etl.sketches import approx_distinct
 
-def check_data_quality(data):
-    print("\n" + "=" * 50)
-    print(" " * 15 + "RELATÓRIO DE QUALIDADE")
-    print("=" * 50 + "\n")
+DEFAULT_SAMPLE_SIZE = 100_000
+APPROX_THRESHOLD = 1_000_000
 
-    for table_name, df in data.items():
-        print(f" {table_name.upper()} ")
-        print(f"Total de registros: {len(df):,}")
+DTYPE_CHECKS = {
+    'integer': pd.api.types.is_integer_dtype,
+    'float32': pd.api.types.is_float_dtype,
+    'float64': pd.api.types.is_float_dtype,
+    'datetime': pd.api.types.is_datetime64_any_dtype,
+    'category': lambda dtype: isinstance(dtype, pd.CategoricalDtype),
+}
 
-        missing = df.isnull().sum()
-        missing = missing[missing > 0]
 
-        if not missing.empty:
-            print("\nValores ausentes:")
-            for col, count in missing.items():
-                print(f"  • {col:<20} {count:>5} ({(count / len(df) * 100):>6.1f}%)")
+class QualityReport:
+    def __init__(self, tables, columns, orphans):
+        self.tables = tables
+        self.columns = columns
+        self.orphans = orphans
 
-        print("-" * 50)
+    @property
+    def passed(self):
+        return (self.tables['duplicate_keys'].fillna(0).sum() == 0
+                and self.columns['dtype_violations'].sum() == 0
+                and self.orphans['orphans'].sum() == 0)
 
-    return True
\ No newline at end of file
+    def issues(self):
+        issues = []
+        for name, row in self.tables[self.tables['duplicate_keys'] > 0].iterrows():
+            issues.append(f"{name}: {row['duplicate_keys']:,.0f} chaves duplicadas")
+        violations = self.columns[self.columns['dtype_violations'] > 0]
+        for (name, col), row in violations.iterrows():
+            issues.append(f"{name}.{col}: {row['dtype_violations']:,.0f} valores fora do tipo {row['expected_dtype']}")
+        for _, row in self.orphans[self.orphans['orphans'] > 0].iterrows():
+            issues.append(f"{row['table']}.{row['column']}: {row['orphans']:,.0f} valores sem correspondência "
+                          f"em {row['references']}")
+        return issues
+
+    def print(self):
+        print("\n" + "=" * 50)
+        print(" " * 15 + "RELATÓRIO DE QUALIDADE")
+        print("=" * 50 + "\n")
+
+        for name, row in self.tables.iterrows():
+            print(f" {name.upper()} ")
+            print(f"Total de registros: {row['rows']:,}" + (" (amostra)" if row['sampled'] else ""))
+
+            missing = self.columns.loc[name]
+            missing = missing[missing['nulls'] > 0]
+            if not missing.empty:
+                print("\nValores ausentes:")
+                for col, col_row in missing.iterrows():
+                    print(f"  • {col:<20} {col_row['nulls']:>5,.0f} ({col_row['null_pct']:>6.1f}%)")
+
+            print("-" * 50)
+
+        issues = self.issues()
+        print("\nProblemas encontrados:" if issues else "\nNenhum problema de integridade encontrado.")
+        for issue in issues:
+            print(f"  • {issue}")
+
+
+def _dtype_violations(series, kind):
+    if kind not in DTYPE_CHECKS or DTYPE_CHECKS[kind](series.dtype):
+        return 0
+    present = series.notna()
+    if kind in ('integer', 'float32', 'float64'):
+        coerced = pd.to_numeric(series, errors='coerce')
+        invalid = coerced.isna()
+        if kind == 'integer':
+            invalid |= coerced.notna() & (coerced % 1 != 0)
+    elif kind == 'datetime':
+        invalid = pd.to_datetime(series, errors='coerce').isna()
+    else:
+        return 0
+    return int((invalid & present).sum())
+
+
+def _min_max(df):
+    orderable = df.select_dtypes(include=['number', 'datetime', 'bool'])
+    if orderable.empty:
+        return pd.Series(dtype=object), pd.Series(dtype=object)
+    return orderable.min(), orderable.max()
+
+
+def profile_table(name, df, approximate=None, sample_size=DEFAULT_SAMPLE_SIZE):
+    if approximate is None:
+        approximate = len(df) > APPROX_THRESHOLD
+    sample = df.sample(sample_size, random_state=0) if approximate and len(df) > sample_size else df
+    scale = len(df) / len(sample) if len(sample) else 1
+
+    nulls = sample.isna().sum() * scale
+    if approximate:
+        distinct = pd.Series({col: approx_distinct(df[col].dropna()) for col in df.columns})
+    else:
+        distinct = df.nunique()
+    minimum, maximum = _min_max(sample)
+
+    schema = get_schema(name)
+    # Valores inválidos já convertidos em nulo na carga não aparecem mais na coluna: vêm contados no df
+    coerced = df.attrs.get(COERCED_ATTR, {})
+    columns = pd.DataFrame({
+        'dtype': df.dtypes.astype(str),
+        'expected_dtype': pd.Series(schema, dtype=object).reindex(df.columns),
+        'nulls': nulls.round(),
+        'null_pct': (nulls / len(df) * 100) if len(df) else 0.0,
+        'distinct': distinct.round(),
+        'min': minimum.reindex(df.columns),
+        'max': maximum.reindex(df.columns),
+        'dtype_violations': [round(_dtype_violations(sample[col], schema.get(col)) * scale) + coerced.get(col, 0)
+                             for col in df.columns],
+    }).rename_axis('column')
+
+    key = [col for col in PRIMARY_KEYS.get(name, []) if col in df.columns]
+    duplicate_keys = int(df.duplicated(key).sum()) if key and len(key) == len(PRIMARY_KEYS[name]) else None
+
+    table = {'rows': len(df), 'columns': df.shape[1], 'sampled': len(sample) < len(df),
+             'duplicate_keys': duplicate_keys}
+    return table, columns
+
+
+def find_orphans(data, tables):
+    rows = []
+    for (table, column), (ref_table, ref_column) in FOREIGN_KEYS.items():
+        if table not in tables or ref_table not in tables:
+            continue
+        values, ref_values = data[table], data[ref_table]
+        if column not in values.columns or ref_column not in ref_values.columns:
+            continue
+        keys = values[column].dropna()
+        missing = ~keys.isin(ref_values[ref_column].unique())
+        rows.append({'table': table, 'column': column, 'references': f'{ref_table}.{ref_column}',
+                     'orphans': int(missing.sum()), 'distinct_orphans': keys[missing].nunique()})
+    return pd.DataFrame(rows, columns=['table', 'column', 'references', 'orphans', 'distinct_orphans'])
+
+
+def check_data_quality(data, tables=None, approximate=None, sample_size=DEFAULT_SAMPLE_SIZE, verbose=False):
+    tables = list(tables if tables is not None else data.keys())
+    table_rows = {}
+    column_frames = {}
+    for name in tables:
+        table_rows[name], column_frames[name] = profile_table(name, data[name], approximate, sample_size)
+
+    report = QualityReport(
+        tables=pd.DataFrame.from_dict(table_rows, orient='index'),
+        columns=pd.concat(column_frames, names=['table']),
+        orphans=find_orphans(data, tables),
+    )
+    if verbose:
+        report.print()
+    return report
@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+
+# Chaves inteiras com até DENSE_FACTOR posições por linha usam um array direto; acima disso, hash
+DENSE_FACTOR = 4
+MISSING = -1
+
+
+def take(series, positions):
+    # Posição -1 vira nulo (NaN/NaT/categoria ausente), como numa junção à esquerda sem correspondência
+    values = series.array if isinstance(series.dtype, pd.api.extensions.ExtensionDtype) else series.to_numpy()
+    return pd.api.extensions.take(values, positions, allow_fill=True)
+
+
+class DimensionIndex:
+    def __init__(self, df, key):
+        self.df = df
+        self.key = key
+        keys = df[key]
+        self.unique = keys.is_unique
+        self.offset = None
+        self.positions = None
+        self._index = None
+
+        values = keys.to_numpy()
+        if pd.api.types.is_integer_dtype(keys) and len(values):
+            low, high = int(values.min()), int(values.max())
+            span = high - low + 1
+            if span <= DENSE_FACTOR * len(values) + 1024:
+                # positions[chave - offset] = linha da dimensão (ou -1)
+                self.offset = low
+                self.positions = np.full(span, MISSING, dtype=np.intp)
+                self.positions[values - low] = np.arange(len(values), dtype=np.intp)
+        if self.positions is None:
+            self._index = pd.Index(values)
+
+    def __len__(self):
+        return len(self.df)
+
+    def __repr__(self):
+        kind = 'dense' if self.positions is not None else 'hash'
+        return f"DimensionIndex({self.key!r}, rows={len(self)}, {kind})"
+
+    def lookup(self, keys):
+        if isinstance(keys, pd.Series):
+            keys = keys.array
+        if isinstance(keys, pd.Categorical):
+            # Converte uma vez por categoria e indexa pelos códigos
+            category_positions = self.lookup(np.asarray(keys.categories))
+            return chain_positions(np.asarray(keys.codes, dtype=np.intp), category_positions)
+
+        keys = np.asarray(keys)
+        if self.positions is None or not pd.api.types.is_integer_dtype(keys):
+            return self._hash_index().get_indexer(keys)
+        shifted = keys.astype(np.int64) - self.offset
+        valid = (shifted >= 0) & (shifted < len(self.positions))
+        result = np.full(len(keys), MISSING, dtype=np.intp)
+        result[valid] = self.positions[shifted[valid]]
+        return result
+
+    def _hash_index(self):
+        if self._index is None:
+            self._index = pd.Index(self.df[self.key].to_numpy())
+        return self._index
+
+    def attach(self, target, positions, columns):
+        for col in columns:
+            target[col] = take(self.df[col], positions)
+        return target
+
+
+def chain_positions(positions, next_positions):
+    # Compõe duas buscas (ex.: linha -> produto -> categoria) mantendo -1 onde a primeira falhou
+    if len(next_positions) == 0:
+        return np.full(len(positions), MISSING, dtype=np.intp)
+    return np.where(positions >= 0, next_positions.take(positions, mode='clip'), MISSING)
@@ -0,0 +1,224 @@
+import json
+import os
+import shutil
+import tempfile
+from collections.abc import Mapping
+
+import numpy as np
+import pandas as pd
+
+from src.etl.cache import file_signature, get_cache_dir, replace_directory
+from src.etl.dimensions import DimensionIndex
+from src.etl.schema import get_schema, schema_key
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+except ImportError:
+    pa = None
+    ds = None
+
+PARTITIONED_TABLES = ('orders', 'order_details')
+PARTITION_KEYS = ('year_month', 'ship_country')
+DEFAULT_PARTITION_BY = ('year_month',)
+PARTITION_DIRNAME = 'partitioned'
+META_FILENAME = 'meta.json'
+PARTITION_VERSION = 1
+# Posição da linha no CSV: a leitura filtrada devolve as linhas na ordem original
+ROW_COLUMN = '_row'
+# order_details não tem data nem país: as colunas vão junto nos arquivos só para o pushdown
+FILTER_COLUMNS = ('order_date', 'ship_country')
+
+
+def partitions_available():
+    return ds is not None
+
+
+def get_partition_by():
+    # NORTHWIND_PARTITION_BY=year_month,ship_country particiona também por país
+    value = os.environ.get('NORTHWIND_PARTITION_BY')
+    partition_by = tuple(key.strip() for key in value.split(',') if key.strip()) if value else DEFAULT_PARTITION_BY
+    unknown = set(partition_by) - set(PARTITION_KEYS)
+    if unknown:
+        raise ValueError(f"Chaves de partição desconhecidas: {sorted(unknown)}")
+    return partition_by
+
+
+def get_partition_dir(data_dir):
+    return os.path.join(get_cache_dir(data_dir), PARTITION_DIRNAME)
+
+
+class TableFilter:
+    # Intervalo de order_date (inclusivo nas duas pontas) e países de entrega
+    def __init__(self, start=None, end=None, countries=None):
+        self.start = None if start is None else pd.Timestamp(start)
+        self.end = None if end is None else pd.Timestamp(end)
+        self.countries = None if countries is None else tuple(sorted(set(countries)))
+
+    @classmethod
+    def coerce(cls, filters):
+        if filters is None or isinstance(filters, cls):
+            return filters
+        if isinstance(filters, Mapping):
+            return cls(**filters)
+        raise TypeError(f"Filtro inválido: {filters!r}")
+
+    def __bool__(self):
+        return any(value is not None for value in (self.start, self.end, self.countries))
+
+    def __eq__(self, other):
+        return isinstance(other, TableFilter) and self.key() == other.key()
+
+    def __hash__(self):
+        return hash(json.dumps(self.key(), sort_keys=True))
+
+    def __repr__(self):
+        args = ', '.join(f'{key}={value!r}' for key, value in self.key().items() if value is not None)
+        return f"TableFilter({args})"
+
+    def key(self):
+        return {
+            'start': None if self.start is None else self.start.isoformat(),
+            'end': None if self.end is None else self.end.isoformat(),
+            'countries': None if self.countries is None else list(self.countries),
+        }
+
+    def expression(self, partition_by=()):
+        conditions = []
+        # year_month poda diretórios inteiros; order_date vai para as estatísticas dos row groups
+        if self.start is not None:
+            if 'year_month' in partition_by:
+                conditions.append(ds.field('year_month') >= self.start.strftime('%Y-%m'))
+            conditions.append(ds.field('order_date') >= self.start)
+        if self.end is not None:
+            if 'year_month' in partition_by:
+                conditions.append(ds.field('year_month') <= self.end.strftime('%Y-%m'))
+            conditions.append(ds.field('order_date') <= self.end)
+        if self.countries is not None:
+            conditions.append(ds.field('ship_country').isin(list(self.countries)))
+        if not conditions:
+            return None
+        expression = conditions[0]
+        for condition in conditions[1:]:
+            expression = expression & condition
+        return expression
+
+    def mask(self, frame):
+        # Mesma semântica da expressão: data ou país nulos ficam de fora
+        mask = np.ones(len(frame), dtype=bool)
+        if self.start is not None:
+            mask &= (frame['order_date'] >= self.start).to_numpy()
+        if self.end is not None:
+            mask &= (frame['order_date'] <= self.end).to_numpy()
+        if self.countries is not None:
+            mask &= frame['ship_country'].isin(self.countries).to_numpy()
+        return mask
+
+
+def _partitioning(partition_by):
+    return ds.partitioning(pa.schema([(key, pa.string()) for key in partition_by]), flavor='hive')
+
+
+def _partition_frames(orders, order_details, partition_by):
+    orders = orders.assign(**{ROW_COLUMN: np.arange(len(orders))})
+    keys = orders[['order_id', *FILTER_COLUMNS]].drop_duplicates('order_id')
+    index = DimensionIndex(keys, 'order_id')
+    order_details = order_details.assign(**{ROW_COLUMN: np.arange(len(order_details))})
+    index.attach(order_details, index.lookup(order_details['order_id']), FILTER_COLUMNS)
+
+    frames = {'orders': orders, 'order_details': order_details}
+    for frame in frames.values():
+        if 'year_month' in partition_by:
+            frame['year_month'] = frame['order_date'].dt.strftime('%Y-%m')
+        for key in partition_by:
+            frame[key] = frame[key].astype(object)
+    return frames
+
+
+def write_partitioned_tables(data_dir, source_paths, reader, partition_by=DEFAULT_PARTITION_BY):
+    root = get_partition_dir(data_dir)
+    signatures = {name: file_signature(path) for name, path in source_paths.items()}
+    tables = {name: reader(name) for name in PARTITIONED_TABLES}
+    frames = _partition_frames(tables['orders'], tables['order_details'], partition_by)
+    meta = {
+        'version': PARTITION_VERSION,
+        'partition_by': list(partition_by),
+        'sources': signatures,
+        'schemas': {name: schema_key(name) for name in PARTITIONED_TABLES},
+        'columns': {name: list(table.columns) for name, table in tables.items()},
+    }
+
+    # Diretório temporário por processo: reconstruções concorrentes não apagam a saída uma da outra
+    os.makedirs(os.path.dirname(root), exist_ok=True)
+    tmp_root = tempfile.mkdtemp(prefix=f'{os.path.basename(root)}.', suffix='.tmp', dir=os.path.dirname(root))
+    try:
+        for name, frame in frames.items():
+            ds.write_dataset(pa.Table.from_pandas(frame, preserve_index=False), os.path.join(tmp_root, name),
+                             format='parquet', partitioning=_partitioning(partition_by),
+                             basename_template='part-{i}.parquet')
+        with open(os.path.join(tmp_root, META_FILENAME), 'w', encoding='utf-8') as f:
+            json.dump(meta, f, indent=2, sort_keys=True)
+    except BaseException:
+        shutil.rmtree(tmp_root, ignore_errors=True)
+        raise
+    replace_directory(tmp_root, root)
+    return meta
+
+
+def read_partition_meta(data_dir):
+    path = os.path.join(get_partition_dir(data_dir), META_FILENAME)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _is_fresh(meta, source_paths, partition_by):
+    if meta is None or meta.get('version') != PARTITION_VERSION:
+        return False
+    if meta['partition_by'] != list(partition_by):
+        return False
+    if meta['schemas'] != {name: schema_key(name) for name in PARTITIONED_TABLES}:
+        return False
+    return meta['sources'] == {name: file_signature(path) for name, path in source_paths.items()}
+
+
+def open_partitioned_dataset(data_dir, name, partition_by):
+    return ds.dataset(os.path.join(get_partition_dir(data_dir), name), format='parquet',
+                      partitioning=_partitioning(partition_by))
+
+
+def ensure_partitioned_tables(data_dir, source_paths, reader, partition_by=None):
+    partition_by = tuple(partition_by or get_partition_by())
+    meta = read_partition_meta(data_dir)
+    if not _is_fresh(meta, source_paths, partition_by):
+        meta = write_partitioned_tables(data_dir, source_paths, reader, partition_by)
+    return meta
+
+
+def count_partitions(data_dir, name, filters=None):
+    # (partições lidas, partições existentes) para um filtro
+    meta = read_partition_meta(data_dir)
+    dataset = open_partitioned_dataset(data_dir, name, meta['partition_by'])
+    expression = filters.expression(meta['partition_by']) if filters else None
+    return len(list(dataset.get_fragments(filter=expression))), len(dataset.files)
+
+
+def load_partitioned_table(name, data_dir, source_paths, reader, columns=None, filters=None, partition_by=None):
+    meta = ensure_partitioned_tables(data_dir, source_paths, reader, partition_by)
+    partition_by = meta['partition_by']
+    dataset = open_partitioned_dataset(data_dir, name, partition_by)
+    columns = list(columns) if columns is not None else meta['columns'][name]
+    expression = filters.expression(partition_by) if filters else None
+
+    table = dataset.to_table(columns=columns + [ROW_COLUMN], filter=expression)
+    df = table.to_pandas()
+    df = df.sort_values(ROW_COLUMN, kind='stable').drop(columns=ROW_COLUMN).reset_index(drop=True)
+    # Os arquivos já guardam os tipos do esquema; só as chaves de partição voltam como texto
+    for key in partition_by:
+        if key in df.columns and get_schema(name).get(key) == 'category':
+            df[key] = df[key].astype('category')
+    return df
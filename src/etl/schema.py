@@ -0,0 +1,126 @@
+import hashlib
+import json
+
+import pandas as pd
+
+# integer: reduzido ao menor inteiro que comporta os valores (se não houver nulos)
+# float64 é mantido nas colunas que entram no cálculo de receita
+TABLE_SCHEMAS = {
+    'orders': {
+        'order_id': 'integer',
+        'customer_id': 'category',
+        'employee_id': 'integer',
+        'order_date': 'datetime',
+        'required_date': 'datetime',
+        'shipped_date': 'datetime',
+        'ship_via': 'integer',
+        'freight': 'float32',
+        'ship_city': 'category',
+        'ship_region': 'category',
+        'ship_country': 'category',
+    },
+    'order_details': {
+        'order_id': 'integer',
+        'product_id': 'integer',
+        'unit_price': 'float64',
+        'quantity': 'integer',
+        'discount': 'float64',
+    },
+    'products': {
+        'product_id': 'integer',
+        'product_name': 'category',
+        'supplier_id': 'integer',
+        'category_id': 'integer',
+        'unit_price': 'float64',
+        'units_in_stock': 'integer',
+        'units_on_order': 'integer',
+        'reorder_level': 'integer',
+        'discontinued': 'integer',
+    },
+    'categories': {
+        'category_id': 'integer',
+        'category_name': 'category',
+    },
+    'customers': {
+        'customer_id': 'category',
+        'company_name': 'category',
+        'city': 'category',
+        'region': 'category',
+        'country': 'category',
+    },
+}
+
+PRIMARY_KEYS = {
+    'orders': ['order_id'],
+    'order_details': ['order_id', 'product_id'],
+    'products': ['product_id'],
+    'customers': ['customer_id'],
+    'employees': ['employee_id'],
+    'categories': ['category_id'],
+    'suppliers': ['supplier_id'],
+    'shippers': ['shipper_id'],
+    'region': ['region_id'],
+    'territories': ['territory_id'],
+}
+
+# (tabela, coluna) -> (tabela referenciada, coluna referenciada)
+FOREIGN_KEYS = {
+    ('order_details', 'order_id'): ('orders', 'order_id'),
+    ('order_details', 'product_id'): ('products', 'product_id'),
+    ('orders', 'customer_id'): ('customers', 'customer_id'),
+    ('orders', 'employee_id'): ('employees', 'employee_id'),
+    ('orders', 'ship_via'): ('shippers', 'shipper_id'),
+    ('products', 'category_id'): ('categories', 'category_id'),
+    ('products', 'supplier_id'): ('suppliers', 'supplier_id'),
+    ('territories', 'region_id'): ('region', 'region_id'),
+    ('employee_territories', 'employee_id'): ('employees', 'employee_id'),
+    ('employee_territories', 'territory_id'): ('territories', 'territory_id'),
+}
+
+
+# df.attrs[COERCED_ATTR] = {coluna: valores inválidos convertidos em nulo}; lido pelo relatório de qualidade
+COERCED_ATTR = 'coerced_values'
+
+
+def get_schema(name):
+    return TABLE_SCHEMAS.get(name, {})
+
+
+def schema_key(name):
+    encoded = json.dumps(get_schema(name), sort_keys=True).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()[:16]
+
+
+def read_csv_options(name, columns=None):
+    schema = get_schema(name)
+    selected = [col for col in schema if columns is None or col in columns]
+    # Números e datas são convertidos em apply_schema: um valor inválido vira nulo (e é contado)
+    # em vez de abortar a leitura do arquivo inteiro
+    dtype = {col: schema[col] for col in selected if schema[col] == 'category'}
+    parse_dates = [col for col in selected if schema[col] == 'datetime']
+    return {'dtype': dtype, 'parse_dates': parse_dates}
+
+
+def _coerce(df, col, converted):
+    invalid = int((converted.isna() & df[col].notna()).sum())
+    if invalid:
+        df.attrs.setdefault(COERCED_ATTR, {})[col] = invalid
+    df[col] = converted
+
+
+def apply_schema(name, df):
+    for col, kind in get_schema(name).items():
+        if col not in df.columns:
+            continue
+        if kind == 'integer' and pd.api.types.is_integer_dtype(df[col]):
+            df[col] = pd.to_numeric(df[col], downcast='integer')
+        elif kind in ('float32', 'float64'):
+            if not pd.api.types.is_numeric_dtype(df[col]):
+                _coerce(df, col, pd.to_numeric(df[col], errors='coerce'))
+            if df[col].dtype != kind:
+                df[col] = df[col].astype(kind)
+        elif kind == 'datetime' and not pd.api.types.is_datetime64_any_dtype(df[col]):
+            _coerce(df, col, pd.to_datetime(df[col], errors='coerce'))
+        elif kind == 'category' and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype('category')
+    return df
@@ -0,0 +1,122 @@
+import json
+import os
+
+import pandas as pd
+
+from src.etl.cache import file_signature, get_cache_dir
+from src.etl.data_loader import TABLES, LazyTables, get_data_dir, get_table_path, load_all_data, load_table
+from src.etl.partitions import TableFilter
+from src.etl.schema import schema_key
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+STORE_DIRNAME = 'shared'
+STORE_VERSION = 2
+METADATA_KEY = b'northwind'
+
+
+def store_available():
+    return pa is not None
+
+
+def shared_store_enabled():
+    return os.environ.get('NORTHWIND_SHARED_STORE', '') not in ('', '0')
+
+
+def get_store_dir(data_dir):
+    # NORTHWIND_SHARED_STORE_DIR=/dev/shm/northwind mantém os arquivos fora do disco
+    return os.environ.get('NORTHWIND_SHARED_STORE_DIR') or os.path.join(get_cache_dir(data_dir), STORE_DIRNAME)
+
+
+def store_path(store_dir, name):
+    return os.path.join(store_dir, f'{name}.arrow')
+
+
+def _expected_metadata(name, data_dir):
+    return {
+        'version': STORE_VERSION,
+        'source': file_signature(get_table_path(name, data_dir)),
+        'schema': schema_key(name),
+    }
+
+
+def _arrow_table(df):
+    # from_pandas transforma NaN de float em nulo, e coluna com nulo é copiada no to_pandas:
+    # floats vão com from_pandas=False, NaN no próprio dado e sem bitmap de validade.
+    # Datas e categorias com nulos continuam sendo copiadas na leitura
+    schema = pa.Schema.from_pandas(df, preserve_index=False)
+    arrays = [pa.array(df[field.name].to_numpy(), type=field.type, from_pandas=False)
+              if pd.api.types.is_float_dtype(df[field.name]) else pa.Array.from_pandas(df[field.name])
+              for field in schema]
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+def write_store_table(df, path, metadata):
+    # Um único lote e sem compressão: é o que permite ao to_pandas apontar direto para as páginas
+    # mapeadas em vez de copiar as colunas
+    table = _arrow_table(df)
+    schema_metadata = {**(table.schema.metadata or {}), METADATA_KEY: json.dumps(metadata).encode('utf-8')}
+    table = table.replace_schema_metadata(schema_metadata)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with pa.OSFile(tmp_path, 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    # Troca atômica: quem já mapeou o arquivo antigo continua lendo a versão anterior
+    os.replace(tmp_path, path)
+
+
+def open_store_table(path):
+    return pa.ipc.open_file(pa.memory_map(path, 'r')).read_all()
+
+
+def _stored_metadata(table):
+    return json.loads((table.schema.metadata or {}).get(METADATA_KEY, b'{}'))
+
+
+def materialize_table(name, data_dir=None, store_dir=None):
+    data_dir = data_dir or get_data_dir()
+    store_dir = store_dir or get_store_dir(data_dir)
+    metadata = _expected_metadata(name, data_dir)
+    os.makedirs(store_dir, exist_ok=True)
+    write_store_table(load_table(name, data_dir), store_path(store_dir, name), metadata)
+    return store_path(store_dir, name)
+
+
+def materialize_store(data_dir=None, tables=None, store_dir=None):
+    return {name: materialize_table(name, data_dir, store_dir) for name in tables or TABLES}
+
+
+def attach_table(name, data_dir, store_dir, columns=None):
+    path = store_path(store_dir, name)
+    table = open_store_table(path) if os.path.exists(path) else None
+    if table is None or _stored_metadata(table) != _expected_metadata(name, data_dir):
+        materialize_table(name, data_dir, store_dir)
+        table = open_store_table(path)
+    if columns is not None:
+        table = table.select(list(columns))
+    # As colunas devolvidas são somente leitura: as páginas pertencem ao arquivo mapeado
+    return table.to_pandas(split_blocks=True)
+
+
+class SharedTables(LazyTables):
+    def __init__(self, data_dir=None, columns=None, tables=TABLES, store_dir=None):
+        super().__init__(data_dir, True, columns, tables)
+        self.store_dir = store_dir or get_store_dir(self.data_dir)
+
+    def _load(self, name):
+        return attach_table(name, self.data_dir, self.store_dir, self.columns.get(name))
+
+
+def attach_all_data(data_dir=None, use_cache=True, columns=None, tables=TABLES, filters=None, store_dir=None):
+    # Mesma assinatura de load_all_data; sem pyarrow, sem cache ou com filtros o carregamento é privado
+    if not store_available() or not use_cache or TableFilter.coerce(filters):
+        return load_all_data(data_dir, use_cache, columns, tables, filters)
+    return SharedTables(data_dir, columns, tables, store_dir)
+
+
+def get_loader():
+    # NORTHWIND_SHARED_STORE=1 troca load_all_data pelo armazenamento compartilhado
+    return attach_all_data if shared_store_enabled() else load_all_data
@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+
+DEFAULT_PRECISION = 12
+
+
+def hash_values(values):
+    return pd.util.hash_pandas_object(pd.Series(values), index=False).to_numpy(dtype=np.uint64)
+
+
+class HyperLogLog:
+    def __init__(self, precision=DEFAULT_PRECISION, registers=None):
+        self.precision = precision
+        self.registers = (np.zeros(1 << precision, dtype=np.uint8)
+                          if registers is None else np.asarray(registers, dtype=np.uint8))
+
+    @classmethod
+    def from_values(cls, values, precision=DEFAULT_PRECISION):
+        sketch = cls(precision)
+        sketch.add(values)
+        return sketch
+
+    def add(self, values):
+        self.add_hashes(hash_values(values))
+        return self
+
+    def add_hashes(self, hashes):
+        if len(hashes) == 0:
+            return self
+        np.maximum.at(self.registers, *register_updates(hashes, self.precision))
+        return self
+
+    def merge(self, other):
+        if other.precision != self.precision:
+            raise ValueError("Não é possível combinar sketches de precisões diferentes")
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def count(self):
+        return estimate_cardinality(self.registers)
+
+
+def register_updates(hashes, precision):
+    hashes = np.asarray(hashes, dtype=np.uint64)
+    index = (hashes >> np.uint64(64 - precision)).astype(np.int64)
+    remainder = hashes << np.uint64(precision)
+    # bit_length via expoente do float: posição do primeiro bit 1 do restante
+    _, bit_length = np.frexp(remainder.astype(np.float64))
+    rank = np.where(remainder == 0, 64 - precision + 1, 64 - bit_length + 1)
+    return index, rank.astype(np.uint8)
+
+
+def estimate_cardinality(registers):
+    m = len(registers)
+    alpha = 0.7213 / (1 + 1.079 / m)
+    raw = alpha * m * m / np.sum(np.ldexp(1.0, -registers.astype(np.int64)))
+    zeros = np.count_nonzero(registers == 0)
+    if raw <= 2.5 * m and zeros:
+        return m * np.log(m / zeros)
+    return raw
+
+
+def approx_distinct(values, precision=DEFAULT_PRECISION):
+    return HyperLogLog.from_values(values, precision).count()
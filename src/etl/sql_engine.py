@@ -0,0 +1,138 @@
+import os
+import sqlite3
+
+import pandas as pd
+
+from src.etl.cache import get_cache_dir
+from src.etl.data_loader import get_data_dir, get_table_path, load_table
+from src.etl.sales_fact import FACT_SOURCES
+from src.instrumentation import stage
+
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+ENGINES = ('duckdb', 'sqlite')
+SQL_TABLES = FACT_SOURCES + ('customers',)
+
+# Expressões que variam entre os motores; {0}/{1} são colunas de data/hora
+DIALECTS = {
+    'duckdb': {
+        'year': 'CAST(year({0}) AS INTEGER)',
+        'month': 'CAST(month({0}) AS INTEGER)',
+        'year_month': "strftime({0}, '%Y-%m')",
+        'days_between': "(date_diff('second', {0}, {1}) // 86400)",
+    },
+    'sqlite': {
+        'year': "CAST(strftime('%Y', {0}) AS INTEGER)",
+        'month': "CAST(strftime('%m', {0}) AS INTEGER)",
+        'year_month': "strftime('%Y-%m', {0})",
+        'days_between': "((strftime('%s', {1}) - strftime('%s', {0})) / 86400)",
+    },
+}
+
+SALES_FACT_VIEW = """
+CREATE VIEW sales_fact AS
+SELECT od.order_id, od.product_id, od.unit_price, od.quantity, od.discount,
+       o.customer_id, o.order_date, o.ship_country,
+       p.product_name, p.category_id, p.discontinued, c.category_name,
+       od.unit_price * od.quantity * (1 - od.discount) AS total_sale,
+       {year} AS year, {month} AS month, {year_month} AS year_month
+FROM order_details od
+LEFT JOIN orders o ON o.order_id = od.order_id
+LEFT JOIN products p ON p.product_id = od.product_id
+LEFT JOIN categories c ON c.category_id = p.category_id
+"""
+
+
+def default_engine():
+    return 'duckdb' if duckdb is not None else 'sqlite'
+
+
+def _sqlite_frame(df):
+    # sqlite não conhece categorias nem datas: grava os valores como texto
+    df = df.copy()
+    for col in df.columns:
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype(object)
+        elif pd.api.types.is_datetime64_any_dtype(df[col]):
+            df[col] = df[col].dt.strftime('%Y-%m-%d %H:%M:%S')
+    return df
+
+
+class SQLEngine:
+    def __init__(self, engine=None, threads=None, memory_limit=None, temp_dir=None):
+        self.engine = engine or default_engine()
+        if self.engine not in ENGINES:
+            raise ValueError(f"Motor SQL desconhecido: {self.engine}")
+        if self.engine == 'duckdb':
+            if duckdb is None:
+                raise ImportError("duckdb não está instalado; use engine='sqlite'")
+            self.connection = duckdb.connect()
+            if threads:
+                self.connection.execute(f"SET threads TO {int(threads)}")
+            if memory_limit:
+                self.connection.execute(f"SET memory_limit = '{memory_limit}'")
+            if temp_dir:
+                # Agregações e joins que não cabem no limite de memória transbordam para disco
+                os.makedirs(temp_dir, exist_ok=True)
+                self.connection.execute(f"SET temp_directory = '{temp_dir}'")
+        else:
+            self.connection = sqlite3.connect(':memory:', check_same_thread=False)
+        self.tables = []
+
+    def __repr__(self):
+        return f"SQLEngine({self.engine!r}, tables={self.tables})"
+
+    def expression(self, name, *columns):
+        return DIALECTS[self.engine][name].format(*columns)
+
+    def register(self, name, df):
+        with stage(f'sql_register[{name}]', rows=len(df)):
+            if self.engine == 'duckdb':
+                self.connection.register(name, df)
+            else:
+                _sqlite_frame(df).to_sql(name, self.connection, index=False)
+        self.tables.append(name)
+
+    def register_csv(self, name, path):
+        if self.engine != 'duckdb':
+            raise ValueError("Leitura direta de CSV só está disponível com duckdb")
+        path = path.replace("'", "''")
+        self.connection.execute(f"CREATE VIEW {name} AS SELECT * FROM read_csv_auto('{path}')")
+        self.tables.append(name)
+
+    def create_sales_fact(self):
+        self.connection.execute(SALES_FACT_VIEW.format(
+            year=self.expression('year', 'o.order_date'),
+            month=self.expression('month', 'o.order_date'),
+            year_month=self.expression('year_month', 'o.order_date')))
+
+    def query(self, sql, params=()):
+        if self.engine == 'duckdb':
+            return self.connection.execute(sql, list(params)).df()
+        return pd.read_sql_query(sql, self.connection, params=list(params))
+
+    def scalar(self, sql, params=()):
+        return self.connection.execute(sql, list(params)).fetchone()[0]
+
+    def close(self):
+        self.connection.close()
+
+
+def connect(data=None, tables=SQL_TABLES, engine=None, source='memory', data_dir=None, **options):
+    # source='memory' registra as tabelas já carregadas; source='csv' (duckdb) consulta os CSVs direto
+    data_dir = data_dir or getattr(data, 'data_dir', None) or get_data_dir()
+    if source == 'csv' and 'temp_dir' not in options:
+        options['temp_dir'] = os.path.join(get_cache_dir(data_dir), 'sql_spill')
+    sql_engine = SQLEngine(engine, **options)
+    for name in tables:
+        if source == 'csv':
+            sql_engine.register_csv(name, get_table_path(name, data_dir))
+        elif data is not None:
+            sql_engine.register(name, data[name])
+        else:
+            sql_engine.register(name, load_table(name, data_dir))
+    sql_engine.create_sales_fact()
+    return sql_engine
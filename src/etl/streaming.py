@@ -0,0 +1,76 @@
+import pandas as pd
+
+from src.etl.data_loader import get_table_path, load_table
+from src.etl.dimensions import DimensionIndex
+from src.etl.sales_fact import FACT_COLUMNS
+from src.etl.schema import apply_schema, read_csv_options
+
+DEFAULT_CHUNK_SIZE = 250_000
+
+AGGREGATE_KEYS = {
+    'product': ['product_id', 'product_name'],
+    'category': ['category_name'],
+    'month': ['year_month'],
+    'country': ['ship_country'],
+    'customer': ['customer_id'],
+}
+
+
+def iter_order_details(data_dir=None, chunksize=DEFAULT_CHUNK_SIZE, columns=None):
+    usecols = list(columns or FACT_COLUMNS['order_details'])
+    reader = pd.read_csv(get_table_path('order_details', data_dir), delimiter=';', usecols=usecols,
+                         chunksize=chunksize, **read_csv_options('order_details', usecols))
+    for chunk in reader:
+        yield apply_schema('order_details', chunk)
+
+
+def _load_dimensions(data_dir, use_cache):
+    # orders fica inteira em memória (um registro por pedido) para resolver mês, país e cliente de
+    # cada linha: só order_details é lida em lotes
+    orders = load_table('orders', data_dir, use_cache, FACT_COLUMNS['orders'])
+    orders['year_month'] = orders['order_date'].dt.to_period('M')
+    orders = orders.drop(columns='order_date')
+
+    products = load_table('products', data_dir, use_cache, FACT_COLUMNS['products'])
+    categories = DimensionIndex(load_table('categories', data_dir, use_cache, FACT_COLUMNS['categories']),
+                                'category_id')
+    # categoria resolvida uma vez por produto: cada lote faz só uma busca por produto
+    category_positions = categories.lookup(products['category_id'])
+    products = products[['product_id', 'product_name']].copy()
+    categories.attach(products, category_positions, ['category_name'])
+    return DimensionIndex(orders, 'order_id'), DimensionIndex(products, 'product_id')
+
+
+def _enrich_chunk(chunk, orders, products):
+    chunk = chunk.assign(total_sale=chunk['unit_price'] * chunk['quantity'] * (1 - chunk['discount']))
+    orders.attach(chunk, orders.lookup(chunk['order_id']), orders.df.columns.drop('order_id'))
+    products.attach(chunk, products.lookup(chunk['product_id']), ['product_name', 'category_name'])
+    return chunk
+
+
+def _fold(accumulated, partial):
+    if accumulated is None:
+        return partial
+    return accumulated.add(partial, fill_value=0)
+
+
+def stream_sales_aggregates(data_dir=None, chunksize=DEFAULT_CHUNK_SIZE, use_cache=True):
+    orders, products = _load_dimensions(data_dir, use_cache)
+    aggregates = dict.fromkeys(AGGREGATE_KEYS)
+    total_lines = 0
+
+    for chunk in iter_order_details(data_dir, chunksize):
+        total_lines += len(chunk)
+        chunk = _enrich_chunk(chunk, orders, products)
+        for name, keys in AGGREGATE_KEYS.items():
+            partial = chunk.groupby(keys, observed=True)[['total_sale', 'quantity']].sum()
+            aggregates[name] = _fold(aggregates[name], partial)
+
+    for name, result in aggregates.items():
+        if result is None:
+            continue
+        result['quantity'] = result['quantity'].astype('int64')
+        aggregates[name] = result.sort_values('total_sale', ascending=False)
+
+    aggregates['total_lines'] = total_lines
+    return aggregates
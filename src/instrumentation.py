@@ -0,0 +1,139 @@
+import contextlib
+import json
+import os
+import threading
+import time
+import tracemalloc
+
+import pandas as pd
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+_TRACER = None
+
+
+def _max_rss_mb():
+    if resource is None:
+        return None
+    # ru_maxrss é em KB no Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class Tracer:
+    def __init__(self, trace_memory=True):
+        self.trace_memory = trace_memory
+        self.records = []
+        self._local = threading.local()
+        self._started_tracemalloc = False
+
+    def start(self):
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+
+    def stop(self):
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    def _stack(self):
+        if not hasattr(self._local, 'stack'):
+            self._local.stack = []
+        return self._local.stack
+
+    def _current_peak(self):
+        if not tracemalloc.is_tracing():
+            return 0
+        return tracemalloc.get_traced_memory()[1]
+
+    @contextlib.contextmanager
+    def stage(self, name, rows=None):
+        stack = self._stack()
+        if stack:
+            stack[-1]['peak'] = max(stack[-1]['peak'], self._current_peak())
+        if tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+
+        frame = {'name': name, 'rows': rows, 'peak': 0}
+        stack.append(frame)
+        wall_start, cpu_start = time.perf_counter(), time.thread_time()
+        try:
+            yield frame
+        finally:
+            wall, cpu = time.perf_counter() - wall_start, time.thread_time() - cpu_start
+            stack.pop()
+            peak = max(frame['peak'], self._current_peak())
+            if stack:
+                stack[-1]['peak'] = max(stack[-1]['peak'], peak)
+            self.records.append({
+                'stage': '/'.join([f['name'] for f in stack] + [name]),
+                'depth': len(stack),
+                'wall_s': wall,
+                'cpu_s': cpu,
+                'peak_traced_mb': peak / 1024 ** 2 if tracemalloc.is_tracing() else None,
+                'max_rss_mb': _max_rss_mb(),
+                'rows': frame['rows'],
+                'pid': os.getpid(),
+            })
+
+    def summary(self):
+        columns = ['stage', 'depth', 'wall_s', 'cpu_s', 'peak_traced_mb', 'max_rss_mb', 'rows', 'pid']
+        return pd.DataFrame(self.records, columns=columns)
+
+    def to_json(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'stages': self.records}, f, indent=2, default=str)
+
+    def print_summary(self):
+        summary = self.summary().drop(columns='pid')
+        summary['stage'] = ['  ' * depth + stage.rsplit('/', 1)[-1]
+                            for stage, depth in zip(summary['stage'], summary['depth'])]
+        print("\n" + "=" * 50)
+        print(" " * 15 + "INSTRUMENTAÇÃO")
+        print("=" * 50 + "\n")
+        width = summary['stage'].str.len().max()
+        print(summary.drop(columns='depth').round(4).to_string(
+            index=False, justify='left', formatters={'stage': lambda name: name.ljust(width)}))
+
+
+def enable_tracing(trace_memory=True):
+    global _TRACER
+    _TRACER = Tracer(trace_memory)
+    _TRACER.start()
+    return _TRACER
+
+
+def disable_tracing():
+    global _TRACER
+    tracer, _TRACER = _TRACER, None
+    if tracer is not None:
+        tracer.stop()
+    return tracer
+
+
+def get_tracer():
+    return _TRACER
+
+
+@contextlib.contextmanager
+def stage(name, rows=None):
+    if _TRACER is None:
+        yield {}
+        return
+    with _TRACER.stage(name, rows) as frame:
+        yield frame
+
+
+def count_rows(result):
+    if isinstance(result, (pd.DataFrame, pd.Series)):
+        return len(result)
+    if hasattr(result, 'tables'):
+        return count_rows(tuple(result.tables.values()))
+    if isinstance(result, tuple):
+        counts = [count_rows(item) for item in result]
+        return sum(c for c in counts if c is not None) if any(c is not None for c in counts) else None
+    return None
+
@@ -0,0 +1,34 @@
+import pandas as pd
+
+from src.analysis.cube import build_monthly_cube
+
+
+def _fact():
+    order_date = pd.to_datetime(['1997-01-10', '1997-01-20', '1997-02-05', None])
+    return pd.DataFrame({
+        'order_id': [1, 2, 3, 4],
+        'customer_id': ['A', 'B', 'A', 'C'],
+        'order_date': order_date,
+        'year_month': order_date.to_period('M'),
+        'category_name': pd.Categorical(['Bebidas', 'Bebidas', 'Doces', 'Doces']),
+        'product_name': pd.Categorical(['Chai', 'Chai', 'Pavlova', 'Pavlova']),
+        'discontinued': [0, 0, 1, 1],
+        'ship_country': pd.Categorical(['Brazil', 'Brazil', 'Germany', 'Germany']),
+        'total_sale': [10.0, 20.0, 30.0, 40.0],
+        'quantity': [1, 2, 3, 4],
+        'discount': [0.0, 0.1, 0.0, 0.2],
+    })
+
+
+def test_rollup_by_month_skips_orders_without_date():
+    monthly = build_monthly_cube(_fact()).rollup(['year', 'month'], approx_distinct=True)
+
+    assert list(monthly.index) == [(1997, 1), (1997, 2)]
+    assert monthly['revenue'].tolist() == [30.0, 30.0]
+    assert monthly['orders_approx'].round().tolist() == [2, 1]
+
+
+def test_rollup_without_date_keys_keeps_orders_without_date():
+    by_category = build_monthly_cube(_fact()).rollup('category_name')
+
+    assert by_category['revenue'].to_dict() == {'Bebidas': 30.0, 'Doces': 70.0}
@@ -0,0 +1,34 @@
+import math
+
+import pandas as pd
+
+from src.analysis.incremental_kpis import IncrementalKPIs, update_kpis
+from src.analysis.kpis import analyze_churn
+
+ORDERS_HEADER = 'order_id;customer_id;employee_id;order_date;required_date;shipped_date;ship_via;freight\n'
+DETAILS_HEADER = 'order_id;product_id;unit_price;quantity;discount\n'
+
+
+def _write_data(data_dir, orders, details=''):
+    (data_dir / 'orders.csv').write_text(ORDERS_HEADER + orders, encoding='utf-8')
+    (data_dir / 'order_details.csv').write_text(DETAILS_HEADER + details, encoding='utf-8')
+
+
+def test_churn_rate_without_orders_is_nan(tmp_path):
+    _write_data(tmp_path, '')
+
+    kpis = IncrementalKPIs().refresh(str(tmp_path))
+
+    assert math.isnan(kpis.churn_rate())
+
+
+def test_churn_rate_without_dated_orders_matches_full_computation(tmp_path):
+    _write_data(tmp_path, '1;C1;1;;;;1;1.0\n2;;1;;;;1;1.0\n', '1;1;10.0;2;0\n')
+
+    ticket_medio, churn_rate = update_kpis(str(tmp_path))
+
+    assert ticket_medio == 20.0
+    assert math.isnan(churn_rate)
+    orders = pd.DataFrame({'order_id': [1, 2], 'customer_id': ['C1', None],
+                           'order_date': pd.to_datetime([None, None])})
+    assert math.isnan(analyze_churn(orders))